@@ -4,4 +4,5 @@ sounddevice
 soundfile
 python-dotenv
 pyttsx3
-psutil
\ No newline at end of file
+psutil
+numpy
@@ -0,0 +1,36 @@
+import os
+from typing import Any, Dict, Optional
+
+from commands.base import CommandProcessor
+from commands.registry import KeywordRegistry
+
+# Default configuration shared by every entry point
+ACTIVATION_WORDS = ["furina", "purina"]
+FUZZY_THRESHOLD = 60.0  # Minimum similarity for fuzzy matching
+# Command manifest: keywords, import paths and app mappings; edits are picked up while running
+COMMANDS_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config", "commands.json")
+
+def build_processor(tts=None, activation_words=None, fuzzy_threshold: float = FUZZY_THRESHOLD,
+                    config_path: str = COMMANDS_CONFIG, watch_config: bool = False,
+                    dependencies: Optional[Dict[str, Any]] = None,
+                    **processor_options) -> CommandProcessor:
+    """
+    Create a CommandProcessor with the commands declared in config_path.
+    Command modules are only imported when one of their keywords first matches.
+    dependencies adds objects commands can ask for with "needs" (e.g. "profiler");
+    with watch_config the manifest is hot-reloaded.
+    """
+    processor = CommandProcessor(activation_words or ACTIVATION_WORDS, fuzzy_threshold=fuzzy_threshold,
+                                 **processor_options)
+
+    registry = KeywordRegistry(processor, config_path, dependencies={
+        "processor": processor,
+        "tts_engine": tts,
+        **(dependencies or {})
+    })
+    if registry.load() is None:
+        print("⚠️  No commands loaded")
+    if watch_config:
+        registry.start_watching()
+
+    return processor
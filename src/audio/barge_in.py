@@ -0,0 +1,197 @@
+"""
+Barge-in: let the user talk over the assistant.
+
+While TTS is playing, a BargeInMonitor reads microphone frames and feeds
+them to a BargeInDetector. When the user starts speaking, playback is
+interrupted (pending speech chunks are dropped) so the next recording can
+start right away. The speech that triggered the detector (plus a little
+audio before it) is kept as a pre-roll for that recording, so the
+activation word said over the assistant is not lost. The time from
+detection until speak() has returned, i.e. until capture can resume, is
+recorded as the "barge_in" latency.
+"""
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import List, Optional
+
+import numpy as np
+
+from audio.dsp import frame_rms
+from audio.ring_buffer import RingReader
+
+class BargeInDetector:
+    """
+    Flags speech over the assistant's own playback.
+
+    The microphone also hears the speaker, so a fixed level would either
+    trigger on the echo or miss quiet users. The baseline follows the peak
+    energy of recent non-speech frames instead (decaying slowly), and a frame
+    counts as speech when it is ratio times louder. The first warmup frames
+    after playback starts only train the baseline, since the echo level jumps
+    the moment the assistant starts talking.
+    """
+
+    def __init__(self, ratio: float = 2.5, min_rms: float = 300.0, trigger_frames: int = 3,
+                 warmup_frames: int = 8, decay: float = 0.995):
+        self.ratio = ratio
+        # Ignore anything quieter than this even in a silent room
+        self.min_rms = min_rms
+        # Consecutive loud frames needed, so clicks and coughs don't interrupt
+        self.trigger_frames = trigger_frames
+        self.warmup_frames = warmup_frames
+        # Per-frame baseline decay (0.995 halves it in about 4 s of 32 ms frames)
+        self.decay = decay
+        self.baseline = 0.0
+        self.loud_frames = 0
+        self.warmup = 0
+
+    def start_playback(self):
+        """Call when the assistant starts speaking"""
+        self.loud_frames = 0
+        self.warmup = self.warmup_frames
+
+    def threshold(self) -> float:
+        return max(self.baseline * self.ratio, self.min_rms)
+
+    def update(self, frame: np.ndarray) -> bool:
+        """Feed one frame. Returns True when the user is talking over playback."""
+        energy = frame_rms(frame)
+        if self.warmup > 0:
+            self.warmup -= 1
+            self.baseline = max(energy, self.baseline * self.decay)
+            return False
+
+        if energy > self.threshold():
+            self.loud_frames += 1
+            return self.loud_frames >= self.trigger_frames
+
+        self.loud_frames = 0
+        self.baseline = max(energy, self.baseline * self.decay)
+        return False
+
+class RingFrames:
+    """
+    Frame source reading the capture process's AudioRing. Pass the
+    RingRecorder's own reader, so a recording started after a barge-in
+    continues exactly where the monitor stopped reading.
+    """
+
+    def __init__(self, reader: RingReader):
+        self.reader = reader
+
+    def start(self):
+        self.reader.skip_to_latest()
+
+    def read(self) -> List[np.ndarray]:
+        _, views = self.reader.read()
+        return [frame for view in views for frame in view]
+
+    def stop(self):
+        pass
+
+class MicrophoneFrames:
+    """Frame source with its own input stream, for the in-process recorder"""
+
+    def __init__(self, samplerate: int = 16000, frame_size: int = 512, device=None):
+        self.samplerate = samplerate
+        self.frame_size = frame_size
+        self.device = device
+        self.frames = queue.Queue()
+        self.stream = None
+
+    def start(self):
+        import sounddevice as sd
+
+        self.frames = queue.Queue()
+        self.stream = sd.InputStream(samplerate=self.samplerate, blocksize=self.frame_size, channels=1,
+                                     dtype='int16', device=self.device,
+                                     callback=lambda indata, frames, time_info, status: self.frames.put(indata[:, 0].copy()))
+        self.stream.start()
+
+    def read(self) -> List[np.ndarray]:
+        frames = []
+        while True:
+            try:
+                frames.append(self.frames.get_nowait())
+            except queue.Empty:
+                return frames
+
+    def stop(self):
+        if self.stream:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
+
+class BargeInMonitor:
+    """Interrupts TTS when the user speaks over it"""
+
+    def __init__(self, tts, source, detector: Optional[BargeInDetector] = None, metrics=None,
+                 poll_interval: float = 0.01, pre_roll_frames: int = 8):
+        self.tts = tts
+        # Any object with start(), read() -> [int16 frames] and stop()
+        self.source = source
+        self.detector = detector or BargeInDetector()
+        # Frames kept from before the loud frames that triggered detection (8 x 32 ms)
+        self.pre_roll_frames = pre_roll_frames
+        self._captured: List[np.ndarray] = []
+        # Optional utils.metrics.MetricsRegistry for the barge_in latency
+        self.metrics = metrics
+        self.poll_interval = poll_interval
+        self.triggered_at = None
+        # Seconds from detection until playback had stopped, for the last barge-in
+        self.latency = None
+
+    @contextmanager
+    def listening(self):
+        """Watch the microphone for the duration of the block (wrap tts.speak)"""
+        self.triggered_at = None
+        self.latency = None
+        self._captured = []
+        self.detector.start_playback()
+        self.source.start()
+        stop = threading.Event()
+        thread = threading.Thread(target=self._watch, args=(stop,), name="barge-in", daemon=True)
+        thread.start()
+        try:
+            yield self
+        finally:
+            stop.set()
+            thread.join()
+            if self.triggered_at is not None:
+                # Everything heard up to now belongs to the user's utterance
+                self._captured.extend(np.array(frame) for frame in self.source.read())
+            self.source.stop()
+            if self.triggered_at is not None:
+                self.latency = time.perf_counter() - self.triggered_at
+                if self.metrics:
+                    self.metrics.observe("barge_in", self.latency)
+                    self.metrics.increment("barge_ins")
+
+    @property
+    def pre_roll(self) -> Optional[np.ndarray]:
+        """Audio from just before the last barge-in until listening() ended, for record_audio"""
+        if self.triggered_at is None or not self._captured:
+            return None
+        return np.concatenate(self._captured)
+
+    def _watch(self, stop: threading.Event):
+        history = deque(maxlen=self.pre_roll_frames + self.detector.trigger_frames)
+        while not stop.is_set():
+            frames = self.source.read()
+            if not frames:
+                time.sleep(self.poll_interval)
+                continue
+            for frame in frames:
+                # Copy: ring views are overwritten once the writer laps them
+                frame = np.array(frame)
+                if self.triggered_at is not None:
+                    self._captured.append(frame)
+                    continue
+                history.append(frame)
+                if self.detector.update(frame):
+                    self.triggered_at = time.perf_counter()
+                    self.tts.interrupt()
+                    self._captured = list(history)
@@ -0,0 +1,112 @@
+"""
+Audio conditioning before transcription: an adaptive noise floor, spectral
+noise suppression and automatic gain control, computed over all frames of
+an utterance at once with NumPy. Each utterance's SNR is reported so audio
+quality can be compared with failed matches ("Furina estadísticas").
+"""
+import math
+from typing import Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+def frame_rms(frame: np.ndarray) -> float:
+    """Root mean square amplitude of an int16 frame"""
+    if len(frame) == 0:
+        return 0.0
+    return float(np.sqrt(np.mean(np.square(frame, dtype=np.float64))))
+
+class AudioConditioner:
+    """
+    Cleans up a recorded utterance before it is sent to Whisper.
+
+    The noise floor (level and spectrum) is estimated from the quietest
+    frames of each utterance and smoothed across utterances, so it follows
+    the room rather than one recording. Suppression subtracts the noise
+    spectrum from 50%-overlapping Hann frames, keeping spectral_floor of each
+    bin to avoid "musical noise". AGC then scales speech to target_dbfs,
+    limited to max_gain_db and to what fits without clipping.
+    """
+
+    def __init__(self, frame_size: int = 512, target_dbfs: float = -20.0, max_gain_db: float = 20.0,
+                 suppression: float = 1.5, spectral_floor: float = 0.1, adaptation: float = 0.3,
+                 min_snr_db: float = 3.0):
+        self.frame_size = frame_size
+        self.hop = frame_size // 2
+        # Periodic Hann: windows half a frame apart sum to exactly 1
+        self.window = np.hanning(frame_size + 1)[:-1]
+        self.window_rms = float(np.sqrt(np.mean(self.window ** 2)))
+        self.target_rms = 32768.0 * 10 ** (target_dbfs / 20)
+        self.max_gain = 10 ** (max_gain_db / 20)
+        # Over-subtraction factor and the minimum gain left in each bin
+        self.suppression = suppression
+        self.spectral_floor = spectral_floor
+        # Weight of the newest utterance in the noise estimates
+        self.adaptation = adaptation
+        # Below this SNR there is no speech to level, so gain is never raised
+        self.min_snr_db = min_snr_db
+        self.noise_floor: Optional[float] = None
+        self.noise_spectrum: Optional[np.ndarray] = None
+        self.last_snr_db: Optional[float] = None
+        self.last_gain_db: Optional[float] = None
+
+    def process(self, audio: np.ndarray) -> Tuple[np.ndarray, float]:
+        """
+        Condition one utterance (int16 samples, mono)
+        Returns: (conditioned int16 audio, SNR of the input in dB)
+        """
+        samples = np.asarray(audio, dtype=np.float64).reshape(-1)
+        if len(samples) < self.frame_size:
+            return np.asarray(audio, dtype=np.int16).reshape(-1), 0.0
+
+        # Pad by half a frame on both sides so every sample is covered by two windows
+        hop = self.hop
+        padded = np.concatenate([np.zeros(hop), samples, np.zeros((-len(samples)) % hop + hop)])
+        windows = sliding_window_view(padded, self.frame_size)[::hop]
+        energy = np.sqrt(np.mean(windows ** 2, axis=1))
+        spectra = np.fft.rfft(windows * self.window, axis=1)
+        magnitude = np.abs(spectra)
+
+        self._update_noise(energy, magnitude)
+        # The loudest fifth of the frames stands in for speech
+        loud = energy >= np.percentile(energy, 80)
+        snr_db = self._snr_db(energy[loud])
+
+        gains = np.maximum(1.0 - self.suppression * self.noise_spectrum / np.maximum(magnitude, 1e-9),
+                           self.spectral_floor)
+        frames = np.fft.irfft(spectra * gains, n=self.frame_size, axis=1)
+
+        # Overlap-add: each frame's halves land in two consecutive hop-sized blocks
+        blocks = np.zeros((len(frames) + 1, hop))
+        blocks[:-1] += frames[:, :hop]
+        blocks[1:] += frames[:, hop:]
+        cleaned = blocks.reshape(-1)[hop:hop + len(samples)]
+
+        speech_rms = float(np.sqrt(np.mean(frames[loud] ** 2))) / self.window_rms
+        gain = min(self.target_rms / max(speech_rms, 1.0), self.max_gain)
+        gain = max(gain, 1 / self.max_gain)
+        if snr_db < self.min_snr_db:
+            gain = min(gain, 1.0)
+        peak = float(np.max(np.abs(cleaned)))
+        if peak * gain > 32000:
+            gain = 32000 / peak
+
+        self.last_snr_db = snr_db
+        self.last_gain_db = 20 * math.log10(gain)
+        return np.round(cleaned * gain).astype(np.int16), snr_db
+
+    def _update_noise(self, energy: np.ndarray, magnitude: np.ndarray):
+        level = float(np.percentile(energy, 10))
+        quiet = energy <= level * 1.5
+        spectrum = magnitude[quiet].mean(axis=0)
+        if self.noise_floor is None:
+            self.noise_floor = level
+            self.noise_spectrum = spectrum
+        else:
+            self.noise_floor += self.adaptation * (level - self.noise_floor)
+            self.noise_spectrum += self.adaptation * (spectrum - self.noise_spectrum)
+
+    def _snr_db(self, speech_energy: np.ndarray) -> float:
+        noise_power = max(self.noise_floor, 1.0) ** 2
+        speech_power = float(np.mean(speech_energy ** 2)) - noise_power
+        return 10 * math.log10(max(speech_power, noise_power * 1e-3) / noise_power)
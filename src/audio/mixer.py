@@ -0,0 +1,268 @@
+import platform
+import re
+import subprocess
+import threading
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+class MixerError(Exception):
+    """A mixer command could not be applied"""
+
+class MixerBackend(ABC):
+    """Abstract base class for system volume backends"""
+
+    @abstractmethod
+    def change_volume(self, delta: int) -> bool:
+        """Change output volume by delta percent. Returns True if successful."""
+        pass
+
+    @abstractmethod
+    def mute(self) -> Optional[bool]:
+        """Mute (or toggle mute). Returns new muted state, or None if unknown. Raises MixerError on failure."""
+        pass
+
+    @abstractmethod
+    def is_available(self) -> bool:
+        """Check if the backend can be used on this system"""
+        pass
+
+    def get_level(self) -> Optional[int]:
+        """Last known output volume in percent, without spawning anything"""
+        return None
+
+    def close(self):
+        """Release any long-lived resources"""
+        pass
+
+class AmixerSession(MixerBackend):
+    """Linux ALSA mixer driven through one long-lived 'amixer -s' process"""
+
+    LEVEL_PATTERN = re.compile(r'\[(\d+)%\]')
+
+    def __init__(self, control: str = "Master"):
+        self.control = control
+        self.process = None
+        self.level = None
+        self.muted = None
+        self.lock = threading.Lock()
+        self._reader = None
+        if platform.system() == "Linux":
+            self._start()
+
+    def _start(self):
+        """Start the amixer process and the thread that parses its output"""
+        try:
+            self.process = subprocess.Popen(
+                ["amixer", "-s"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                bufsize=1
+            )
+        except (FileNotFoundError, OSError):
+            self.process = None
+            return
+
+        self._reader = threading.Thread(target=self._read_output, daemon=True)
+        self._reader.start()
+        # Prime the cached level (written directly: _send may be holding the lock to restart us)
+        self._write(f"sget {self.control}")
+
+    def _read_output(self):
+        """Keep level/mute state in sync with what amixer reports"""
+        for line in self.process.stdout:
+            match = self.LEVEL_PATTERN.search(line)
+            if match:
+                self.level = int(match.group(1))
+                if "[off]" in line:
+                    self.muted = True
+                elif "[on]" in line:
+                    self.muted = False
+
+    def _send(self, command: str) -> bool:
+        with self.lock:
+            if not self.process or self.process.poll() is not None:
+                # The session died; try to start a fresh one once
+                self._start()
+                if not self.process:
+                    return False
+            return self._write(command)
+
+    def _write(self, command: str) -> bool:
+        """Write one command to the session; callers other than _start hold self.lock"""
+        try:
+            self.process.stdin.write(command + "\n")
+            self.process.stdin.flush()
+            return True
+        except (BrokenPipeError, OSError):
+            self.process = None
+            return False
+
+    def change_volume(self, delta: int) -> bool:
+        if delta == 0:
+            return True
+        sign = "+" if delta > 0 else "-"
+        return self._send(f"sset {self.control} {abs(delta)}%{sign}")
+
+    def mute(self) -> Optional[bool]:
+        if not self._send(f"sset {self.control} toggle"):
+            raise MixerError("amixer session is not running")
+        return None if self.muted is None else not self.muted
+
+    def get_level(self) -> Optional[int]:
+        return self.level
+
+    def is_available(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def close(self):
+        if self.process:
+            try:
+                self.process.stdin.close()
+                self.process.wait(timeout=1)
+            except Exception:
+                self.process.kill()
+            self.process = None
+
+class OsascriptMixer(MixerBackend):
+    """macOS volume control. osascript has no stdin session, but each call reports the new level."""
+
+    def __init__(self):
+        self.level = None
+
+    def _run(self, script: str) -> Optional[str]:
+        try:
+            result = subprocess.run(["osascript", "-e", script], check=True, capture_output=True, text=True)
+            return result.stdout.strip()
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            return None
+
+    def change_volume(self, delta: int) -> bool:
+        output = self._run(
+            f"set volume output volume (output volume of (get volume settings) + {delta})\n"
+            "output volume of (get volume settings)"
+        )
+        if output is None:
+            return False
+        if output.isdigit():
+            self.level = int(output)
+        return True
+
+    def mute(self) -> Optional[bool]:
+        if self._run("set volume with output muted") is None:
+            raise MixerError("osascript failed to mute")
+        return True
+
+    def get_level(self) -> Optional[int]:
+        return self.level
+
+    def is_available(self) -> bool:
+        return platform.system() == "Darwin"
+
+class FakeMixer(MixerBackend):
+    """In-memory mixer for tests; records every applied change"""
+
+    def __init__(self, level: int = 50):
+        self.level = level
+        self.muted = False
+        self.calls: List[int] = []
+
+    def change_volume(self, delta: int) -> bool:
+        self.calls.append(delta)
+        self.level = max(0, min(100, self.level + delta))
+        return True
+
+    def mute(self) -> Optional[bool]:
+        self.muted = not self.muted
+        return self.muted
+
+    def get_level(self) -> Optional[int]:
+        return self.level
+
+    def is_available(self) -> bool:
+        return True
+
+class Mixer:
+    """Front-end that coalesces rapid volume changes into a single backend call"""
+
+    def __init__(self, backend: MixerBackend, coalesce_window: float = 0.15, on_error=None):
+        self.backend = backend
+        self.coalesce_window = coalesce_window
+        # Called with the delta when a coalesced change fails to apply in the background
+        self.on_error = on_error
+        self.pending_delta = 0
+        # Whether the last applied change failed; the next change is then applied synchronously
+        self.last_flush_failed = False
+        self.lock = threading.Lock()
+        self._timer = None
+
+    def change_volume(self, delta: int) -> bool:
+        """
+        Queue a volume change; changes within the window are applied as one delta.
+        If the backend is down or the last flush failed, the change is applied
+        right away instead, so the caller sees the failure.
+        """
+        if not self.coalesce_window:
+            return self.backend.change_volume(delta)
+
+        with self.lock:
+            self.pending_delta += delta
+            synchronous = self.last_flush_failed or not self.backend.is_available()
+            if not synchronous and self._timer is None:
+                self._timer = threading.Timer(self.coalesce_window, self.flush, kwargs={"background": True})
+                self._timer.daemon = True
+                self._timer.start()
+        if synchronous:
+            return self.flush()
+        return True
+
+    def flush(self, background: bool = False) -> bool:
+        """Apply any pending delta now (background: called by the coalescing timer, failures go to on_error)"""
+        with self.lock:
+            delta = self.pending_delta
+            self.pending_delta = 0
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if delta == 0:
+            return True
+        applied = self.backend.change_volume(delta)
+        self.last_flush_failed = not applied
+        if not applied and background and self.on_error:
+            self.on_error(delta)
+        return applied
+
+    def mute(self) -> Optional[bool]:
+        self.flush()
+        return self.backend.mute()
+
+    def get_level(self) -> Optional[int]:
+        """Current level including changes that have not been applied yet"""
+        level = self.backend.get_level()
+        if level is None:
+            return None
+        with self.lock:
+            return max(0, min(100, level + self.pending_delta))
+
+    def is_available(self) -> bool:
+        return self.backend.is_available()
+
+    def close(self):
+        self.flush()
+        self.backend.close()
+
+def create_mixer(coalesce_window: float = 0.15, on_error=None) -> Optional[Mixer]:
+    """Select the mixer backend for the current OS. Returns None if unsupported."""
+    current_os = platform.system()
+
+    if current_os == "Linux":
+        backend = AmixerSession()
+    elif current_os == "Darwin":  # macOS
+        backend = OsascriptMixer()
+    else:
+        return None
+
+    if not backend.is_available():
+        return None
+    return Mixer(backend, coalesce_window=coalesce_window, on_error=on_error)
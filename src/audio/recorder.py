@@ -1,3 +1,4 @@
+import numpy as np
 import sounddevice as sd
 import soundfile as sf
 
@@ -6,17 +7,39 @@ class AudioRecorder:
         self.duration = duration
         self.filename = filename
         self.samplerate = samplerate
+        # Input device: the sounddevice module, or anything with its rec/wait API (see tools.replay)
+        self.sounddevice = sd
+        # Optional conditioning stage, see set_dsp
+        self.dsp = None
+        # SNR in dB of the last recording, when a DSP stage is set
+        self.last_snr_db = None
     
-    def record_audio(self):
-        """Records audio for the specified duration"""
+    def set_dsp(self, dsp):
+        """Set the stage applied to each recording before saving (e.g. audio.dsp.AudioConditioner)"""
+        self.dsp = dsp
+    
+    def record_audio(self, pre_roll=None):
+        """
+        Records audio for the specified duration
+        pre_roll: int16 samples already heard (e.g. BargeInMonitor.pre_roll), counted in the duration
+        """
         print("Recording audio...")
-        audio = sd.rec(
-            int(self.duration * self.samplerate), 
-            samplerate=self.samplerate, 
-            channels=1, 
-            dtype='int16'
-        )
-        sd.wait()
+        frames = int(self.duration * self.samplerate)
+        if pre_roll is not None:
+            frames = max(frames - len(pre_roll), 0)
+        audio = np.zeros((0, 1), dtype=np.int16)
+        if frames:
+            audio = self.sounddevice.rec(
+                frames, 
+                samplerate=self.samplerate, 
+                channels=1, 
+                dtype='int16'
+            )
+            self.sounddevice.wait()
+        if pre_roll is not None:
+            audio = np.concatenate([np.asarray(pre_roll, dtype=np.int16).reshape(-1, 1), audio])
+        if self.dsp:
+            audio, self.last_snr_db = self.dsp.process(audio)
         sf.write(self.filename, audio, self.samplerate)
         print("Recording finished.")
         return self.filename
\ No newline at end of file
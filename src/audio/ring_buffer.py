@@ -0,0 +1,285 @@
+"""
+Shared-memory audio ring between a capture process and its consumers.
+
+A dedicated capture process owns the PortAudio stream and copies each block
+into a multiprocessing.shared_memory ring, so GIL-heavy work in the main
+process (fuzzy matching, TTS) can't delay the audio callback. Consumers
+(VAD, wake word, transcription) read zero-copy NumPy views of the ring.
+
+There is a single writer and no lock: the writer stores a frame, then
+publishes it by bumping a 64-bit sequence counter in the header. Each
+reader keeps its own position and counts the frames it lost to overwrites.
+"""
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+
+from audio.recorder import AudioRecorder
+
+# Header: eight int64 slots in front of the frame data
+HEADER_SLOTS = 8
+WRITE_SEQ, CAPTURE_OVERFLOWS, CAPACITY, FRAME_SIZE, SAMPLERATE = range(5)
+
+class AudioRing:
+    """Fixed number of int16 mono frames in shared memory"""
+
+    def __init__(self, capacity: int = 320, frame_size: int = 512, samplerate: int = 16000,
+                 name: Optional[str] = None, create: bool = True):
+        if create:
+            size = HEADER_SLOTS * 8 + capacity * frame_size * 2
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        else:
+            self.shm = _attach(name)
+        self.owner = create
+
+        self.header = np.ndarray((HEADER_SLOTS,), dtype=np.int64, buffer=self.shm.buf)
+        if create:
+            self.header[:] = 0
+            self.header[CAPACITY] = capacity
+            self.header[FRAME_SIZE] = frame_size
+            self.header[SAMPLERATE] = samplerate
+        self.capacity = int(self.header[CAPACITY])
+        self.frame_size = int(self.header[FRAME_SIZE])
+        self.samplerate = int(self.header[SAMPLERATE])
+        self.frames = np.ndarray((self.capacity, self.frame_size), dtype=np.int16,
+                                 buffer=self.shm.buf, offset=HEADER_SLOTS * 8)
+
+    @classmethod
+    def attach(cls, name: str) -> "AudioRing":
+        """Open a ring created by another process"""
+        return cls(name=name, create=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def write_seq(self) -> int:
+        """Number of frames written so far"""
+        return int(self.header[WRITE_SEQ])
+
+    @property
+    def capture_overflows(self) -> int:
+        """Input overflows reported by the audio driver"""
+        return int(self.header[CAPTURE_OVERFLOWS])
+
+    def write(self, frame: np.ndarray):
+        """Store one frame and publish it (single writer only)"""
+        seq = int(self.header[WRITE_SEQ])
+        slot = self.frames[seq % self.capacity]
+        count = min(len(frame), self.frame_size)
+        slot[:count] = frame[:count]
+        if count < self.frame_size:
+            slot[count:] = 0
+        # Aligned 64-bit store, made after the data so readers never see a partial frame
+        self.header[WRITE_SEQ] = seq + 1
+
+    def close(self):
+        """Detach; the creating process also frees the memory. Drop reader views first."""
+        self.header = None
+        self.frames = None
+        try:
+            self.shm.close()
+        except BufferError:
+            print("⚠️  Audio ring still has views in use; memory is released at exit")
+            return
+        if self.owner:
+            self.shm.unlink()
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    try:
+        # Only the creator should unlink the segment (Python 3.13+)
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Older Pythons: processes we spawn share our resource tracker, so this is harmless
+        return shared_memory.SharedMemory(name=name)
+
+class RingReader:
+    """One consumer's position in an AudioRing"""
+
+    def __init__(self, ring: AudioRing, from_start: bool = False, metrics=None):
+        self.ring = ring
+        self.seq = 0 if from_start else ring.write_seq
+        self.dropped = 0
+        # Optional utils.metrics.MetricsRegistry for the dropped-frame counters
+        self.metrics = metrics
+        self._overflows_seen = ring.capture_overflows
+
+    def available(self) -> int:
+        return self.ring.write_seq - self.seq
+
+    def skip_to_latest(self):
+        """Discard unread frames, e.g. when a new recording starts"""
+        self.seq = self.ring.write_seq
+
+    def read(self, max_frames: Optional[int] = None) -> Tuple[int, List[np.ndarray]]:
+        """
+        Returns (sequence of the first frame, views) without copying; views
+        holds one array, or two when the range wraps around the ring end.
+        Views stay valid until the writer laps them, see intact().
+        """
+        head = self.ring.write_seq
+        # The slot at head - capacity is the one being overwritten next
+        oldest = head - self.ring.capacity + 1
+        if self.seq < oldest:
+            self._drop(oldest - self.seq)
+            self.seq = oldest
+
+        count = head - self.seq
+        if max_frames is not None:
+            count = min(count, max_frames)
+        start_seq = self.seq
+        if count <= 0:
+            return start_seq, []
+
+        start = start_seq % self.ring.capacity
+        end = start + count
+        frames = self.ring.frames
+        if end <= self.ring.capacity:
+            views = [frames[start:end]]
+        else:
+            views = [frames[start:], frames[:end - self.ring.capacity]]
+        self.seq += count
+        self._sync_overflows()
+        return start_seq, views
+
+    def intact(self, seq: int) -> bool:
+        """True if frames from seq onwards have not been overwritten yet"""
+        return seq > self.ring.write_seq - self.ring.capacity
+
+    def _drop(self, frames: int):
+        self.dropped += frames
+        if self.metrics:
+            self.metrics.increment("audio_dropped_frames", frames)
+
+    def _sync_overflows(self):
+        overflows = self.ring.capture_overflows
+        if overflows != self._overflows_seen:
+            if self.metrics:
+                self.metrics.increment("audio_capture_overflows", overflows - self._overflows_seen)
+            self._overflows_seen = overflows
+
+def _capture_main(ring_name: str, device, ready, stop):
+    """Capture process entry point: PortAudio callback -> ring"""
+    import sounddevice as sd
+
+    ring = AudioRing.attach(ring_name)
+
+    def callback(indata, frames, time_info, status):
+        if status.input_overflow:
+            ring.header[CAPTURE_OVERFLOWS] += 1
+        ring.write(indata[:, 0])
+
+    try:
+        with sd.InputStream(samplerate=ring.samplerate, blocksize=ring.frame_size, channels=1,
+                            dtype='int16', device=device, callback=callback):
+            ready.set()
+            stop.wait()
+    finally:
+        ring.close()
+
+class CaptureProcess:
+    """Runs audio capture into an AudioRing in a separate process"""
+
+    def __init__(self, ring: AudioRing, device=None):
+        self.ring = ring
+        self.device = device
+        # Spawn: a fresh interpreter that doesn't inherit our threads or GIL load
+        self.context = multiprocessing.get_context("spawn")
+        self.ready = self.context.Event()
+        self.stop_event = self.context.Event()
+        self.process = None
+
+    def start(self, timeout: float = 10.0) -> bool:
+        """Start capturing. Returns False if the stream did not open in time."""
+        self.process = self.context.Process(
+            target=_capture_main, args=(self.ring.name, self.device, self.ready, self.stop_event),
+            name="audio-capture", daemon=True
+        )
+        self.process.start()
+        if not self.ready.wait(timeout):
+            print("⚠️  Audio capture process did not start")
+            return False
+        return True
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def stop(self, timeout: float = 2.0):
+        self.stop_event.set()
+        if self.process:
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+            self.process = None
+
+class RingRecorder(AudioRecorder):
+    """AudioRecorder reading from a capture process through a shared-memory ring"""
+
+    # Seconds past the recording duration to wait for frames before giving up
+    STALL_TIMEOUT = 2.0
+
+    def __init__(self, duration=5, filename="recording.wav", samplerate=16000,
+                 frame_size=512, buffered_seconds=20.0, device=None, metrics=None):
+        super().__init__(duration, filename, samplerate)
+        capacity = int(buffered_seconds * samplerate / frame_size)
+        self.ring = AudioRing(capacity, frame_size, samplerate)
+        self.capture = CaptureProcess(self.ring, device)
+        self.reader = RingReader(self.ring, metrics=metrics)
+
+    def set_metrics(self, metrics):
+        """Set the registry that receives dropped-frame counters"""
+        self.reader.metrics = metrics
+
+    def start(self) -> bool:
+        return self.capture.start()
+
+    def record_audio(self, pre_roll=None):
+        """
+        Records audio for the specified duration
+        pre_roll: samples already read from this recorder's reader (e.g. by a
+        barge-in monitor); recording then continues from the reader's position
+        """
+        print("Recording audio...")
+        needed = int(self.duration * self.samplerate / self.ring.frame_size)
+        frame_seconds = self.ring.frame_size / self.samplerate
+        views = []
+        if pre_roll is None:
+            self.reader.skip_to_latest()
+        else:
+            views.append(np.asarray(pre_roll, dtype=np.int16).reshape(-1, self.ring.frame_size))
+            needed = max(needed - len(views[0]), 0)
+        first_seq = self.reader.seq
+
+        # Frames arrive in real time; allow some slack before giving up on the capture process
+        deadline = time.monotonic() + self.duration + self.STALL_TIMEOUT
+        while needed > 0:
+            _, chunk = self.reader.read(needed)
+            if not chunk:
+                if not self.capture.is_alive():
+                    raise RuntimeError("Audio capture process is not running")
+                if time.monotonic() > deadline:
+                    raise RuntimeError("Audio capture stalled: no frames from the capture process")
+                time.sleep(frame_seconds)
+                continue
+            views.extend(chunk)
+            needed -= sum(len(view) for view in chunk)
+
+        # One copy, straight from shared memory into the file buffer
+        audio = np.concatenate(views).reshape(-1)
+        if not self.reader.intact(first_seq):
+            print("⚠️  Recording overwritten while reading; increase buffered_seconds")
+        if self.dsp:
+            audio, self.last_snr_db = self.dsp.process(audio)
+        sf.write(self.filename, audio, self.samplerate)
+        print("Recording finished.")
+        return self.filename
+
+    def close(self):
+        self.capture.stop()
+        self.reader = None
+        self.ring.close()
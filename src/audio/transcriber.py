@@ -1,25 +1,71 @@
 from openai import OpenAI
+import math
 import os
+from typing import Optional, Tuple
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Whisper reports language names; keywords are tagged with ISO 639-1 codes
+LANGUAGE_CODES = {
+    "spanish": "es",
+    "english": "en",
+    "portuguese": "pt",
+    "french": "fr",
+    "german": "de",
+    "italian": "it",
+}
+
 class AudioTranscriber:
-    def __init__(self):
+    def __init__(self, language: Optional[str] = None):
         self.client = OpenAI()
+        # None lets Whisper detect the language; a code like "es" pins it
+        self.language = language
     
     def transcribe_audio(self, filename):
         """Transcribes audio file using Whisper"""
+        return self.transcribe_with_language(filename)[0]
+    
+    def transcribe_with_language(self, filename) -> Tuple[Optional[str], Optional[str], float]:
+        """
+        Transcribes audio file using Whisper
+        Returns: (text, language code, confidence 0-1); text is None on error
+        """
         try:
+            options = {"language": self.language} if self.language else {}
             with open(filename, "rb") as audio_file:
                 transcript = self.client.audio.transcriptions.create(
                     model="whisper-1",
                     file=audio_file,
-                    language="es"
+                    response_format="verbose_json",
+                    **options
                 )
             text = transcript.text
-            print("Transcribed text:", text)
-            return text
+            language = self.language or self._language_code(getattr(transcript, "language", None))
+            confidence = 1.0 if self.language else self._confidence(getattr(transcript, "segments", None))
+            print(f"Transcribed text ({language or '?'}, {confidence:.0%}):", text)
+            return text, language, confidence
         except Exception as e:
             print(f"Error transcribing audio: {e}")
-            return None
\ No newline at end of file
+            return None, None, 0.0
+    
+    @staticmethod
+    def _language_code(language: Optional[str]) -> Optional[str]:
+        if not language:
+            return None
+        language = language.lower()
+        return LANGUAGE_CODES.get(language, language if len(language) == 2 else None)
+    
+    @staticmethod
+    def _confidence(segments) -> float:
+        """
+        Mean token probability over segments. The API has no language
+        probability, so a poor transcription is treated as an unsure language.
+        """
+        if not segments:
+            return 0.0
+        logprobs = [
+            segment["avg_logprob"] if isinstance(segment, dict) else segment.avg_logprob
+            for segment in segments
+        ]
+        return sum(math.exp(logprob) for logprob in logprobs) / len(logprobs)
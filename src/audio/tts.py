@@ -1,11 +1,17 @@
 import platform
+import re
 import subprocess
 import os
+import threading
 from abc import ABC, abstractmethod
+from typing import List, Optional
 
 class TTSEngine(ABC):
     """Abstract base class for Text-to-Speech engines"""
     
+    # Speech process currently playing, so stop() can end it from another thread
+    _process = None
+    
     @abstractmethod
     def speak(self, text: str) -> bool:
         """Speak the given text. Returns True if successful."""
@@ -15,17 +21,34 @@ class TTSEngine(ABC):
     def is_available(self) -> bool:
         """Check if the TTS engine is available on this system"""
         pass
+    
+    def stop(self):
+        """Cut the current utterance short (called from another thread)"""
+        process = self._process
+        if process and process.poll() is None:
+            process.terminate()
+    
+    def _run(self, args: List[str], input: Optional[str] = None) -> bool:
+        """Run a speech command until it finishes or stop() is called. Returns True on exit status 0."""
+        process = subprocess.Popen(args, stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, text=True)
+        self._process = process
+        try:
+            process.communicate(input)
+        finally:
+            self._process = None
+        return process.returncode == 0
 
 class WindowsTTS(TTSEngine):
     """Windows Text-to-Speech using built-in SAPI"""
     
     def speak(self, text: str) -> bool:
         try:
-            # Using PowerShell with Windows Speech API
-            command = f'powershell -Command "Add-Type -AssemblyName System.speech; $speak = New-Object System.Speech.Synthesis.SpeechSynthesizer; $speak.Speak(\'{text}\')"'
-            subprocess.run(command, shell=True, check=True, capture_output=True)
-            return True
-        except (subprocess.CalledProcessError, FileNotFoundError):
+            # Using PowerShell with Windows Speech API (no shell, so stop() ends PowerShell itself)
+            text = text.replace("'", "''")
+            command = f"Add-Type -AssemblyName System.speech; $speak = New-Object System.Speech.Synthesis.SpeechSynthesizer; $speak.Speak('{text}')"
+            return self._run(["powershell", "-Command", command])
+        except FileNotFoundError:
             return False
         except Exception:
             return False
@@ -38,10 +61,7 @@ class MacOSTTS(TTSEngine):
     
     def speak(self, text: str) -> bool:
         try:
-            subprocess.run(["say", text], check=True, capture_output=True)
-            return True
-        except subprocess.CalledProcessError:
-            return False
+            return self._run(["say", text])
         except FileNotFoundError:
             return False
         except Exception:
@@ -81,13 +101,14 @@ class LinuxTTS(TTSEngine):
         
         try:
             if self.engine == "espeak":
-                subprocess.run(["espeak", text], check=True, capture_output=True)
+                return self._run(["espeak", text])
             elif self.engine == "festival":
-                subprocess.run(["festival", "--tts"], input=text, text=True, check=True, capture_output=True)
+                return self._run(["festival", "--tts"], input=text)
             elif self.engine == "spd-say":
-                subprocess.run(["spd-say", text], check=True, capture_output=True)
-            return True
-        except (subprocess.CalledProcessError, FileNotFoundError):
+                # Wait for the speech-dispatcher queue so stop() has a process to end
+                return self._run(["spd-say", "--wait", text])
+            return False
+        except FileNotFoundError:
             return False
         except Exception:
             return False
@@ -129,23 +150,34 @@ class PyttsxTTS(TTSEngine):
             print(f"Error speaking with pyttsx3: {e}")
             return False
     
+    def stop(self):
+        if self.engine:
+            self.engine.stop()
+    
     def is_available(self) -> bool:
         return self.engine is not None
 
 class TextToSpeech:
     """Main TTS class that automatically selects the best available engine"""
     
-    def __init__(self, prefer_pyttsx=False):
+    def __init__(self, prefer_pyttsx=False, engines=None):
         self.engines = []
         self.current_engine = None
         self.enabled = True
+        # Set by interrupt(): ends the current chunk and drops the rest
+        self._interrupt = threading.Event()
+        # Whether the last speak() was cut short by interrupt()
+        self.interrupted = False
         
         print("Initializing TTS engines...")
         
         # Initialize engines in order of preference based on OS
         current_os = platform.system()
         
-        if current_os == "Windows":
+        if engines is not None:
+            # Explicit engine list, e.g. a silent sink for offline replay
+            self.engines = list(engines)
+        elif current_os == "Windows":
             self.engines = [WindowsTTS(), PyttsxTTS()]
         elif current_os == "Darwin":  # macOS
             self.engines = [MacOSTTS(), PyttsxTTS()]
@@ -177,7 +209,10 @@ class TextToSpeech:
             self.enabled = False
     
     def speak(self, text: str) -> bool:
-        """Speak the given text using the selected engine"""
+        """
+        Speak the given text using the selected engine, a few sentences at a
+        time so interrupt() can drop whatever has not been said yet
+        """
         if not self.enabled or not self.current_engine:
             print(f"TTS disabled. Text: {text}")
             return False
@@ -185,11 +220,30 @@ class TextToSpeech:
         if not text or not text.strip():
             return False
         
+        self._interrupt.clear()
+        self.interrupted = False
+        for chunk in split_speech(text):
+            if self._interrupt.is_set():
+                break
+            if not self._speak_chunk(chunk):
+                if not self._interrupt.is_set():
+                    return False
+        
+        self.interrupted = self._interrupt.is_set()
+        return True
+    
+    def interrupt(self):
+        """Stop speaking now and drop the pending chunks. Safe to call from any thread."""
+        self._interrupt.set()
+        if self.current_engine:
+            self.current_engine.stop()
+    
+    def _speak_chunk(self, text: str) -> bool:
         # Try to speak with current engine
         success = self.current_engine.speak(text)
         
-        # If it fails, try other available engines
-        if not success:
+        # If it fails (and wasn't stopped on purpose), try other available engines
+        if not success and not self._interrupt.is_set():
             print(f"Primary TTS engine failed, trying alternatives...")
             for engine in self.engines:
                 if engine != self.current_engine and engine.is_available():
@@ -216,4 +270,21 @@ class TextToSpeech:
         """Get information about the current TTS engine"""
         if not self.current_engine:
             return "No TTS engine available"
-        return f"Engine: {self.current_engine.__class__.__name__}, Enabled: {self.enabled}"
\ No newline at end of file
+        return f"Engine: {self.current_engine.__class__.__name__}, Enabled: {self.enabled}"
+
+def split_speech(text: str, max_chars: int = 160) -> List[str]:
+    """Split text at line and sentence ends into chunks of about max_chars"""
+    chunks = []
+    current = ""
+    for piece in re.split(r"\n+|(?<=[.!?])\s+", text):
+        piece = piece.strip()
+        if not piece:
+            continue
+        if current and len(current) + len(piece) + 1 > max_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current} {piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
@@ -1,11 +1,13 @@
 import subprocess
 import platform
+import shlex
 from .base import BaseCommand
+from utils.app_catalog import AppCatalog
 
 class AppLauncherCommand(BaseCommand):
     """Command to launch applications"""
     
-    def __init__(self):
+    def __init__(self, catalog: AppCatalog = None):
         keywords = ["abre", "abrir", "open", "launch", "ejecuta", "execute"]
         description = "Opens applications (browser, calculator, notepad, etc.)"
         super().__init__(keywords, description)
@@ -48,6 +50,17 @@ class AppLauncherCommand(BaseCommand):
                 "terminal": "gnome-terminal"
             }
         }
+        
+        # Installed applications index, loaded on first use
+        self.catalog = catalog
+    
+    def _get_catalog(self):
+        """Get the installed-applications catalog (Linux/XDG only)"""
+        if self.catalog is None and platform.system() == "Linux":
+            self.catalog = AppCatalog()
+        if self.catalog is not None and not self.catalog.loaded:
+            self.catalog.load()
+        return self.catalog
     
     def execute(self, command_text: str) -> str:
         os_name = platform.system()
@@ -67,6 +80,19 @@ class AppLauncherCommand(BaseCommand):
                 command_to_run = app_command
                 break
         
+        if not command_to_run:
+            catalog = self._get_catalog()
+            match = catalog.lookup(app_name) if catalog else None
+            if match:
+                matched_name, catalog_command = match
+                try:
+                    # Detach so the assistant doesn't wait for the app to exit
+                    subprocess.Popen(shlex.split(catalog_command), stdout=subprocess.DEVNULL,
+                                     stderr=subprocess.DEVNULL, start_new_session=True)
+                    return f"Opening {matched_name}..."
+                except Exception as e:
+                    return f"Error opening {matched_name}: {e}"
+        
         if not command_to_run:
             available_apps = ", ".join(apps_for_os.keys())
             return f"Application '{app_name}' not found. Available: {available_apps}"
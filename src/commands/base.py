@@ -1,19 +1,52 @@
+import asyncio
+import contextvars
+import re
+import time
 from abc import ABC, abstractmethod
+from contextlib import nullcontext
+from concurrent.futures import Executor, ThreadPoolExecutor
 from typing import List, Dict, Optional, Tuple
 from utils.fuzzy_matcher import SmartCommandMatcher
+from utils.metrics import MetricsRegistry
+from utils.counters import ThreadLocalCounters
+from utils.keyword_index import KeywordIndex
+from .session import Session, get_current_session, session_scope
+
+class CommandUnavailableError(Exception):
+    """A command matched but can't run, e.g. its module failed to import"""
 
 class BaseCommand(ABC):
     """Base class for all commands"""
     
+    # Seconds before process_text_async gives up waiting; None uses the processor default
+    timeout: Optional[float] = None
+    # Safe to run speculatively before the user finishes speaking (reads state, changes nothing)
+    side_effect_free: bool = False
+    # Safe to run for unauthenticated network clients (doesn't act on the machine: apps, volume, power)
+    remote_safe: bool = False
+    
     def __init__(self, keywords: List[str], description: str):
         self.keywords = keywords
         self.description = description
+        # keyword -> language codes ("es", "en"); untagged keywords match every language
+        self.keyword_languages: Dict[str, List[str]] = {}
+    
+    @property
+    def name(self) -> str:
+        """Name used in stats, metrics and the commands config file"""
+        return self.__class__.__name__
     
     @abstractmethod
     def execute(self, command_text: str) -> str:
         """Executes the command and returns a response"""
         pass
     
+    async def execute_async(self, command_text: str, executor: Optional[Executor] = None) -> str:
+        """Async version of execute. By default runs execute on the given thread pool."""
+        loop = asyncio.get_running_loop()
+        # Carry the current session into the worker thread
+        return await loop.run_in_executor(executor, contextvars.copy_context().run, self.execute, command_text)
+    
     def can_execute(self, text: str) -> bool:
         """Checks if the command can be executed with the given text"""
         text_lower = text.lower()
@@ -30,58 +63,437 @@ class BaseCommand(ABC):
 class CommandProcessor:
     """Main command processor with enhanced fuzzy matching"""
     
-    def __init__(self, activation_words: List[str], fuzzy_threshold: float = 60.0):
+    # Conjunctions and punctuation that separate intents in one utterance
+    SEGMENT_PATTERN = re.compile(r'\s*(?:[,;!?]|\.(?!\d)|\b(?:y|and|luego|then|también|also|además)\b)\s*')
+    # Fuzzy confidence every segment needs before an utterance is treated as compound
+    COMPOUND_MIN_CONFIDENCE = 90.0
+    
+    def __init__(self, activation_words: List[str], fuzzy_threshold: float = 60.0,
+                 max_workers: int = 4, command_timeout: float = 10.0,
+                 min_language_confidence: float = 0.5):
         self.activation_words = activation_words
         self.commands: List[BaseCommand] = []
-        self.fuzzy_matcher = SmartCommandMatcher(threshold=fuzzy_threshold)
-        self.stats = {
-            'total_commands': 0,
-            'fuzzy_matches': 0,
-            'exact_matches': 0,
-            'failed_matches': 0
-        }
+        # Derived keyword structures, updated incrementally on keyword changes
+        self.keyword_index = KeywordIndex()
+        self.fuzzy_matcher = SmartCommandMatcher(threshold=fuzzy_threshold, keyword_index=self.keyword_index)
+        # Per-thread counters so concurrent process_text calls never contend
+        self.stats = ThreadLocalCounters([
+            'total_commands',
+            'fuzzy_matches',
+            'exact_matches',
+            'failed_matches',
+            'corrections_applied',
+            'language_fallbacks',
+            'refused_remote'
+        ])
+        # Bounded pool used by process_text_async for sync commands
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="command")
+        # Separate small pool for speculative execution (see commands.speculation)
+        self.speculation_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="speculation")
+        self.command_timeout = command_timeout
+        # Below this transcription confidence every language shard is searched
+        self.min_language_confidence = min_language_confidence
+        # Latency histograms per pipeline stage and per command
+        self.metrics = MetricsRegistry()
+        # Optional durable event log, see set_stats_store
+        self.stats_store = None
+        # Optional learned misrecognition rewrites, see set_correction_table
+        self.corrections = None
+        # Bumped when commands, keywords or descriptions change; see cached_view
+        self.version = 0
+        self._views: Dict[Tuple, Tuple[int, object]] = {}
     
     def register_command(self, command: BaseCommand):
         """Registers a new command"""
         self.commands.append(command)
+        for keyword in command.keywords:
+            self.keyword_index.add(command, keyword, command.keyword_languages.get(keyword, ()))
+        self._bump_version()
+    
+    def update_keywords(self, command: BaseCommand, keywords: List[str],
+                        languages: Optional[Dict[str, List[str]]] = None):
+        """
+        Replace a command's keywords while serving, updating only the changed index entries.
+        languages maps keywords to language codes; omitted keywords match every language.
+        """
+        old_keywords, old_languages = command.keywords, command.keyword_languages
+        # Swap in new objects so concurrent matching sees either the old or the new set
+        command.keyword_languages = dict(languages or {})
+        command.keywords = list(keywords)
+        added_words, removed_words = self.keyword_index.update(
+            command, old_keywords, command.keywords, old_languages, command.keyword_languages
+        )
+        if self.corrections and (added_words or removed_words):
+            # New keyword words must not be rewritten; rewrites into removed words are stale
+            self.corrections.forget(tokens=added_words, replacements=removed_words)
+        self._bump_version()
+    
+    def update_description(self, command: BaseCommand, description: str):
+        """Replace a command's description while serving"""
+        command.description = description
+        self._bump_version()
+    
+    def _bump_version(self):
+        self.version += 1
+        self._views = {}
+    
+    def cached_view(self, key: Tuple, build):
+        """
+        Value derived from the registered commands (listings, help pages),
+        built on first use and rebuilt only after the registry version changes.
+        Cached values are shared: don't modify them.
+        """
+        version = self.version
+        entry = self._views.get(key)
+        if entry and entry[0] == version:
+            return entry[1]
+        value = build()
+        # A view built while the registry changed is stored under the old version and rebuilt next time
+        self._views[key] = (version, value)
+        return value
+    
+    def set_correction_table(self, table):
+        """Set the learned correction table (e.g. utils.corrections.CorrectionTable)"""
+        self.corrections = table
+    
+    def set_stats_store(self, store):
+        """Set the durable event log (e.g. utils.stats_store.StatsStore)"""
+        self.stats_store = store
+    
+    def process_text(self, text: str, session: Optional[Session] = None, language: Optional[str] = None,
+                     language_confidence: float = 1.0, speculation=None,
+                     snr_db: Optional[float] = None) -> Optional[str]:
+        """
+        Processes text and executes corresponding command with fuzzy matching.
+        Safe to call from several threads; pass a Session per microphone/client.
+        With a detected language only that language's keywords are searched.
+        speculation: SpeculativeSession whose prepared work may be reused (see commit)
+        snr_db: signal-to-noise ratio of the recording, kept next to the match outcome
+        """
+        with session_scope(session):
+            response = self._process(text, self._shard_for(language, language_confidence), speculation, snr_db)
+            get_current_session().last_response = response
+            return response
+    
+    async def process_text_async(self, text: str, session: Optional[Session] = None, language: Optional[str] = None,
+                                 language_confidence: float = 1.0, speculation=None,
+                                 snr_db: Optional[float] = None) -> Optional[str]:
+        """Async version of process_text. Commands run off the event loop with a timeout."""
+        with session_scope(session):
+            response = await self._process_async(text, self._shard_for(language, language_confidence),
+                                                 speculation, snr_db)
+            get_current_session().last_response = response
+            return response
+    
+    def resolve_text(self, text: str, language: Optional[str] = None, language_confidence: float = 1.0,
+                     memo: Optional[Dict[str, Optional[Tuple[BaseCommand, str, float, str]]]] = None
+                     ) -> List[Tuple[str, Optional[Tuple[BaseCommand, str, float, str]]]]:
+        """
+        Resolves text to commands without executing them (for replay, batch tools and speculation).
+        Nothing is recorded: no stats, no latency metrics and no learned corrections.
+        memo caches resolutions by segment text across calls.
+        Returns: [(segment_text, match)], empty when there is no activation word or command
+        """
+        clean_command, error = self._prepare(text, record=False)
+        if error:
+            return []
+        return self._plan(clean_command, self._shard_for(language, language_confidence, record=False), memo,
+                          record=False)
     
-    def process_text(self, text: str) -> Optional[str]:
-        """Processes text and executes corresponding command with fuzzy matching"""
-        self.stats['total_commands'] += 1
+    def _shard_for(self, language: Optional[str], confidence: float,
+                   record: bool = True) -> Optional[List[Tuple[BaseCommand, List[str]]]]:
+        """Keyword candidates for a detected language, or None to search every command"""
+        if not language:
+            return None
+        if confidence < self.min_language_confidence:
+            if record:
+                self.stats.increment('language_fallbacks')
+            return None
+        return self.keyword_index.shard(language)
+    
+    def _process(self, text: str, shard: Optional[List[Tuple[BaseCommand, List[str]]]] = None,
+                 speculation=None, snr_db: Optional[float] = None) -> Optional[str]:
+        started = time.perf_counter()
+        self.stats.increment('total_commands')
+        
+        clean_command, error = self._prepare(text)
+        if error:
+            self._log_event(text, [], started, snr_db)
+            return error
+        
+        plan = self._plan(clean_command, shard, speculation.memo if speculation else None)
+        if len(plan) == 1:
+            segment, match = plan[0]
+            if not match:
+                response = self._not_recognized(segment, shard)
+            else:
+                response = self._run_match(segment, match, speculation)
+        else:
+            # Compound utterance: answer in utterance order; only side-effect-free segments run concurrently
+            self.stats.increment('total_commands', len(plan) - 1)
+            if self._independent(plan):
+                futures = [
+                    self.executor.submit(contextvars.copy_context().run, self._run_match, segment, match, speculation)
+                    for segment, match in plan
+                ]
+                response = "\n".join(future.result() for future in futures)
+            else:
+                response = "\n".join(self._run_match(segment, match, speculation) for segment, match in plan)
+        
+        self._learn(plan)
+        self._record_snr(plan, snr_db)
+        self._log_event(text, plan, started, snr_db)
+        return response
+    
+    async def _process_async(self, text: str, shard: Optional[List[Tuple[BaseCommand, List[str]]]] = None,
+                             speculation=None, snr_db: Optional[float] = None) -> Optional[str]:
+        started = time.perf_counter()
+        self.stats.increment('total_commands')
+        
+        clean_command, error = self._prepare(text)
+        if error:
+            self._log_event(text, [], started, snr_db)
+            return error
         
-        if not self._is_valid_activation(text):
-            return "No activation keyword found."
+        plan = self._plan(clean_command, shard, speculation.memo if speculation else None)
+        if len(plan) == 1 and not plan[0][1]:
+            response = self._not_recognized(plan[0][0], shard)
+        else:
+            self.stats.increment('total_commands', len(plan) - 1)
+            if self._independent(plan):
+                results = await asyncio.gather(*(self._run_match_async(segment, match, speculation)
+                                                 for segment, match in plan))
+            else:
+                results = [await self._run_match_async(segment, match, speculation) for segment, match in plan]
+            response = "\n".join(results)
+        
+        self._learn(plan)
+        self._record_snr(plan, snr_db)
+        self._log_event(text, plan, started, snr_db)
+        return response
+    
+    def _record_snr(self, plan: List[Tuple[str, Optional[Tuple[BaseCommand, str, float, str]]]],
+                    snr_db: Optional[float]):
+        """SNR histogram per outcome, so audio quality can be compared with failed matches"""
+        if snr_db is None:
+            return
+        for _, match in plan:
+            outcome = "matched" if match else "failed"
+            self.metrics.observe_snr(outcome, snr_db)
+    
+    def _log_event(self, text: str, plan: List[Tuple[str, Optional[Tuple[BaseCommand, str, float, str]]]], started: float,
+                   snr_db: Optional[float] = None):
+        """Append one event per resolved segment to the stats store, if any"""
+        if not self.stats_store:
+            return
         
-        # Remove activation word
-        clean_command = self._clean_activation(text)
+        latency_ms = (time.perf_counter() - started) * 1000
+        if not plan:
+            self.stats_store.record(text, None, "ignored", latency_ms=latency_ms, snr_db=snr_db)
+            return
+        
+        for segment, match in plan:
+            if match:
+                command, match_type, confidence, matched_keyword = match
+                self.stats_store.record(segment, command.name, match_type.replace("_matches", ""),
+                                        matched_keyword, confidence, latency_ms, snr_db=snr_db)
+            else:
+                self.stats_store.record(segment, None, "failed", latency_ms=latency_ms, snr_db=snr_db)
+    
+    def _run_match(self, clean_command: str, match: Tuple[BaseCommand, str, float, str], speculation=None) -> str:
+        """Executes a resolved command (or reuses its speculative result) and formats its response"""
+        command, match_type, confidence, matched_keyword = match
+        refused = self._refuse(command)
+        if refused:
+            return refused
+        prepared = speculation.take(command, clean_command) if speculation else None
+        try:
+            with self.metrics.time("execute", command.name):
+                result = prepared.result() if prepared else command.execute(clean_command)
+        except CommandUnavailableError as e:
+            return self._unavailable(e)
+        self.stats.increment(match_type)
+        return self._format_result(result, match_type, confidence, matched_keyword)
+    
+    async def _run_match_async(self, clean_command: str, match: Tuple[BaseCommand, str, float, str],
+                               speculation=None) -> str:
+        """Async version of _run_match with the per-command timeout applied"""
+        command, match_type, confidence, matched_keyword = match
+        refused = self._refuse(command)
+        if refused:
+            return refused
+        prepared = speculation.take(command, clean_command) if speculation else None
+        try:
+            with self.metrics.time("execute", command.name):
+                result = await asyncio.wait_for(
+                    asyncio.wrap_future(prepared) if prepared else command.execute_async(clean_command, self.executor),
+                    self._timeout_for(command)
+                )
+        except asyncio.TimeoutError:
+            # The worker thread keeps running; only the wait is abandoned
+            return f"⏳ Still working on '{clean_command}'..."
+        except CommandUnavailableError as e:
+            return self._unavailable(e)
+        # Counted once the command completed, like _run_match
+        self.stats.increment(match_type)
+        return self._format_result(result, match_type, confidence, matched_keyword)
+    
+    def _unavailable(self, error: CommandUnavailableError) -> str:
+        """Response for a matched command that can't run; counted as a failed match"""
+        self.stats.increment('failed_matches')
+        return f"❌ {error}"
+    
+    def _refuse(self, command: BaseCommand) -> Optional[str]:
+        """Refusal message when the current session may not run the command, else None"""
+        if get_current_session().trusted or command.remote_safe:
+            return None
+        self.stats.increment('refused_remote')
+        return f"🔒 '{command.name}' acts on the assistant's machine and needs an authenticated client"
+    
+    def _timeout_for(self, command: BaseCommand) -> float:
+        """Per-command timeout, falling back to the processor default"""
+        return command.timeout if command.timeout is not None else self.command_timeout
+    
+    def _timed(self, stage: str, record: bool = True):
+        """Latency timer for a stage, or a no-op when nothing should be recorded"""
+        return self.metrics.time(stage) if record else nullcontext()
+    
+    def _prepare(self, text: str, record: bool = True) -> Tuple[str, Optional[str]]:
+        """Checks activation and strips it. Returns (clean_command, error_response)"""
+        with self._timed("activation", record):
+            if not self._is_valid_activation(text):
+                return "", "No activation keyword found."
+            
+            # Remove activation word
+            clean_command = self._clean_activation(text)
+        
+        if self.corrections:
+            # Known misrecognitions become exact matches
+            clean_command, rewritten = self.corrections.rewrite(clean_command)
+            if rewritten and record:
+                self.stats.increment('corrections_applied', rewritten)
         
         if not clean_command.strip():
-            return "Please specify a command after the activation word."
+            return "", "Please specify a command after the activation word."
         
-        # Try exact matches first
-        for command in self.commands:
-            if command.can_execute(clean_command):
-                result = command.execute(clean_command)
-                self.stats['exact_matches'] += 1
-                return f"✓ {result}"
+        return clean_command, None
+    
+    def _plan(self, clean_command: str, shard: Optional[List[Tuple[BaseCommand, List[str]]]] = None,
+              memo: Optional[Dict[str, Optional[Tuple[BaseCommand, str, float, str]]]] = None,
+              record: bool = True) -> List[Tuple[str, Optional[Tuple[BaseCommand, str, float, str]]]]:
+        """
+        Splits compound utterances ("qué hora es y la fecha") into segments.
+        The text is only treated as compound when every segment resolves
+        confidently on its own; otherwise filler ("hola, cómo estás") or
+        parameters containing "y"/"and" would turn into extra commands.
+        memo: segment text -> match, reused across growing partial transcripts
+        record: False to leave stats and metrics untouched (see resolve_text)
+        Returns: [(segment_text, match)], a single entry when the text is not compound
+        """
+        def resolve(segment: str):
+            if memo is None:
+                return self._resolve(segment, shard, record)
+            if segment not in memo:
+                memo[segment] = self._resolve(segment, shard, record)
+            return memo[segment]
         
-        # Try fuzzy matching
-        fuzzy_result = self.fuzzy_matcher.find_command_match(clean_command, self.commands)
+        segments = [s for s in self.SEGMENT_PATTERN.split(clean_command) if s.strip()]
+        if len(segments) > 1:
+            plan = []
+            for segment in segments:
+                match = resolve(segment)
+                if not self._confident(segment, match):
+                    break
+                plan.append((segment, match))
+            else:
+                return plan
         
+        return [(clean_command, resolve(clean_command))]
+    
+    def _confident(self, segment: str, match: Optional[Tuple[BaseCommand, str, float, str]]) -> bool:
+        """Whether a segment stands on its own as a command: an exact keyword, or a fuzzy match covering the whole keyword"""
+        if not match:
+            return False
+        command, match_type, confidence, matched_keyword = match
+        if match_type == 'exact_matches':
+            return True
+        return (confidence >= self.COMPOUND_MIN_CONFIDENCE and
+                self.fuzzy_matcher.fuzzy.keyword_coverage(segment, matched_keyword, self.fuzzy_matcher.threshold) == 1.0)
+    
+    @staticmethod
+    def _independent(plan: List[Tuple[str, Optional[Tuple[BaseCommand, str, float, str]]]]) -> bool:
+        """Segments may run concurrently only if none of them changes anything ("abre X y cierra X")"""
+        return all(match[0].side_effect_free for _, match in plan)
+    
+    def _resolve(self, clean_command: str, shard: Optional[List[Tuple[BaseCommand, List[str]]]] = None,
+                 record: bool = True) -> Optional[Tuple[BaseCommand, str, float, str]]:
+        """
+        Finds the command for the given text, exact matches first, then fuzzy.
+        With a language shard its keywords are tried first; every keyword is
+        searched if nothing in the shard matches.
+        Returns: (command, stats_key, confidence, matched_keyword)
+        """
+        with self._timed("exact_dispatch", record):
+            match = self._exact_match(clean_command, shard)
+            if not match and shard is not None:
+                match = self._exact_match(clean_command)
+        if match:
+            return match
+        
+        with self._timed("fuzzy_match", record):
+            fuzzy_result = self.fuzzy_matcher.find_command_match(clean_command, self.commands, shard)
+            if not fuzzy_result and shard is not None:
+                # Mixed-language utterance or a wrong language guess
+                if record:
+                    self.stats.increment('language_fallbacks')
+                fuzzy_result = self.fuzzy_matcher.find_command_match(clean_command, self.commands)
         if fuzzy_result:
             command, confidence, matched_keyword = fuzzy_result
-            result = command.execute(clean_command)
-            self.stats['fuzzy_matches'] += 1
-            
-            if confidence < 80.0:
-                # Show confidence for lower matches
-                return f"🔍 (matched '{matched_keyword}' {confidence:.0f}%) {result}"
-            else:
-                return f"✓ {result}"
+            return (command, 'fuzzy_matches', confidence, matched_keyword)
         
-        # No match found, provide suggestions
-        self.stats['failed_matches'] += 1
-        suggestions = self.fuzzy_matcher.suggest_corrections(clean_command, self.commands, max_suggestions=3)
+        return None
+    
+    def _learn(self, plan: List[Tuple[str, Optional[Tuple[BaseCommand, str, float, str]]]]):
+        """Learn corrections from confident fuzzy matches of a dispatched utterance (never from partials)"""
+        if not self.corrections:
+            return
+        for segment, match in plan:
+            if match and match[1] == 'fuzzy_matches' and match[2] >= self.corrections.min_confidence:
+                self.corrections.learn(segment, match[3], self._get_keyword_words())
+    
+    def _exact_match(self, clean_command: str, shard: Optional[List[Tuple[BaseCommand, List[str]]]] = None
+                     ) -> Optional[Tuple[BaseCommand, str, float, str]]:
+        """First command with a keyword contained in the text, optionally within a language shard"""
+        text_lower = clean_command.lower()
+        if shard is None:
+            for command in self.commands:
+                if command.can_execute(clean_command):
+                    keyword = next((k for k in command.keywords if k in text_lower), "")
+                    return (command, 'exact_matches', 100.0, keyword)
+            return None
+        
+        for command, keywords in shard:
+            keyword = next((k for k in keywords if k in text_lower), None)
+            if keyword:
+                return (command, 'exact_matches', 100.0, keyword)
+        return None
+    
+    def _get_keyword_words(self) -> Dict[str, int]:
+        """All words used by registered keywords; these are never learned as corrections"""
+        return self.keyword_index.words()
+    
+    def _format_result(self, result: str, match_type: str, confidence: float, matched_keyword: str) -> str:
+        """Formats a command result, showing confidence for weak fuzzy matches"""
+        if match_type == 'fuzzy_matches' and confidence < 80.0:
+            return f"🔍 (matched '{matched_keyword}' {confidence:.0f}%) {result}"
+        return f"✓ {result}"
+    
+    def _not_recognized(self, clean_command: str, shard: Optional[List[Tuple[BaseCommand, List[str]]]] = None) -> str:
+        """No match found, provide suggestions"""
+        self.stats.increment('failed_matches')
+        with self.metrics.time("suggestion"):
+            suggestions = self.fuzzy_matcher.suggest_corrections(clean_command, self.commands, max_suggestions=3,
+                                                                 shard=shard)
         
         if suggestions:
             suggestion_text = ", ".join(f"'{s}'" for s in suggestions[:2])
@@ -103,20 +515,39 @@ class CommandProcessor:
         return text.strip()
     
     def list_commands(self) -> List[Dict[str, str]]:
-        """Lists all registered commands"""
-        return [
+        """Lists all registered commands (cached until the registry changes)"""
+        return self.cached_view(("list_commands",), lambda: [
             {
+                "name": command.name,
                 "keywords": command.keywords,
-                "description": command.description
+                "description": command.description,
+                "keyword_languages": command.keyword_languages
             }
             for command in self.commands
-        ]
+        ])
+    
+    def list_keywords(self, language: Optional[str] = None) -> Dict[str, List[str]]:
+        """Command name -> keywords usable in a language (all keywords for None), cached"""
+        def build():
+            listing = {}
+            for command in self.commands:
+                languages = command.keyword_languages
+                listing[command.name] = [
+                    keyword for keyword in command.keywords
+                    if language is None or not languages.get(keyword) or language in languages[keyword]
+                ]
+            return listing
+        return self.cached_view(("list_keywords", language), build)
     
     def get_stats(self) -> Dict[str, int]:
         """Get command processing statistics"""
-        return self.stats.copy()
+        return self.stats.snapshot()
     
     def reset_stats(self):
         """Reset statistics"""
-        for key in self.stats:
-            self.stats[key] = 0
\ No newline at end of file
+        self.stats.reset()
+    
+    def shutdown(self):
+        """Stop the worker pools used for async execution and speculation"""
+        self.executor.shutdown(wait=False)
+        self.speculation_executor.shutdown(wait=False)
\ No newline at end of file
@@ -1,10 +1,32 @@
+import re
+from typing import List, Optional
+
 from .base import BaseCommand
+from .session import get_current_session
 
 class HelpCommand(BaseCommand):
-    """Command to show available commands"""
+    """
+    Command to show available commands, a page at a time for big catalogs
+    ("ayuda página 2", "help page 2", "next page"). Rendered pages are cached
+    by the processor until commands or keywords change.
+    """
+    
+    side_effect_free = True
+    remote_safe = True
+    # Commands listed per help page
+    PAGE_SIZE = 8
+    PAGE_PATTERN = re.compile(r"\b(?:página|pagina|page)\s+(\w+)")
+    # Title of a paged response, to find the page "next page" continues from
+    SHOWN_PAGE_PATTERN = re.compile(r"=== Available Commands \((\d+)/\d+\) ===")
+    NEXT_WORDS = ["siguiente", "next", "más", "more"]
+    NUMBER_WORDS = {
+        "uno": 1, "dos": 2, "tres": 3, "cuatro": 4, "cinco": 5, "seis": 6, "siete": 7, "ocho": 8, "nueve": 9, "diez": 10,
+        "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+    }
     
     def __init__(self, command_processor=None):
-        keywords = ["ayuda", "help", "comandos", "commands", "qué puedes hacer", "what can you do"]
+        keywords = ["ayuda", "help", "comandos", "commands", "qué puedes hacer", "what can you do",
+                    "siguiente página", "next page"]
         description = "Shows available commands and how to use them"
         super().__init__(keywords, description)
         self.command_processor = command_processor
@@ -17,30 +39,77 @@ class HelpCommand(BaseCommand):
         if not self.command_processor:
             return "Help system not properly initialized"
         
-        commands_info = self.command_processor.list_commands()
+        language = self._language(command_text)
+        pages = self.command_processor.cached_view(("help_pages", language), lambda: self._render_pages(language))
         
-        help_text = "=== Available Commands ===\n"
-        help_text += f"Activation words: {', '.join(self.command_processor.activation_words)}\n\n"
+        # Only reads the session (the last response), so it is safe to run speculatively
+        shown = self.SHOWN_PAGE_PATTERN.search(get_current_session().last_response or "")
+        last_page = int(shown.group(1)) if shown else 0
+        page = min(max(self._requested_page(command_text, last_page), 1), len(pages))
+        return pages[page - 1]
+    
+    def _language(self, command_text: str) -> Optional[str]:
+        """Language of the help keyword that was said, None if unknown or ambiguous"""
+        text_lower = command_text.lower()
+        for keyword in self.keywords:
+            languages = self.keyword_languages.get(keyword, [])
+            if keyword in text_lower and len(languages) == 1:
+                return languages[0]
+        return None
+    
+    def _requested_page(self, command_text: str, last_page: int) -> int:
+        text_lower = command_text.lower()
+        match = self.PAGE_PATTERN.search(text_lower)
+        if match:
+            number = match.group(1)
+            if number.isdigit():
+                return int(number)
+            if number in self.NUMBER_WORDS:
+                return self.NUMBER_WORDS[number]
+        if any(word in text_lower.split() for word in self.NEXT_WORDS):
+            return last_page + 1
+        return 1
+    
+    def _render_pages(self, language: Optional[str]) -> List[str]:
+        """All help pages for a language (only its keywords are listed)"""
+        processor = self.command_processor
+        keywords_by_command = processor.list_keywords(language)
         
-        for i, cmd_info in enumerate(commands_info, 1):
-            keywords = ", ".join(cmd_info["keywords"][:3])  # Show first 3 keywords
-            if len(cmd_info["keywords"]) > 3:
+        entries = []
+        for i, cmd_info in enumerate(processor.list_commands(), 1):
+            command_keywords = keywords_by_command.get(cmd_info["name"]) or cmd_info["keywords"]
+            keywords = ", ".join(command_keywords[:3])  # Show first 3 keywords
+            if len(command_keywords) > 3:
                 keywords += "..."
-            
-            help_text += f"{i}. Keywords: {keywords}\n"
-            help_text += f"   Description: {cmd_info['description']}\n\n"
-        
-        help_text += "Examples:\n"
-        help_text += "- 'Furina, qué hora es' - Get current time\n"
-        help_text += "- 'Furina, abre navegador' - Open browser\n"
-        help_text += "- 'Furina, fecha de hoy' - Get current date\n"
-        help_text += "- 'Furina, subir volumen' - Increase volume\n"
+            entries.append(f"{i}. Keywords: {keywords}\n   Description: {cmd_info['description']}\n")
         
-        return help_text
+        page_count = max(1, -(-len(entries) // self.PAGE_SIZE))
+        pages = []
+        for page in range(1, page_count + 1):
+            title = "=== Available Commands ===" if page_count == 1 else f"=== Available Commands ({page}/{page_count}) ==="
+            lines = [title, f"Activation words: {', '.join(processor.activation_words)}\n"]
+            lines.extend(entries[(page - 1) * self.PAGE_SIZE:page * self.PAGE_SIZE])
+            if page == 1:
+                lines.extend([
+                    "Examples:",
+                    "- 'Furina, qué hora es' - Get current time",
+                    "- 'Furina, abre navegador' - Open browser",
+                    "- 'Furina, fecha de hoy' - Get current date",
+                    "- 'Furina, subir volumen' - Increase volume",
+                ])
+            if page < page_count:
+                if language == "es":
+                    lines.append(f"\nDi 'ayuda página {page + 1}' o 'siguiente página' para ver más")
+                else:
+                    lines.append(f"\nSay 'help page {page + 1}' or 'next page' for more")
+            pages.append("\n".join(lines) + "\n")
+        return pages
 
 class GreetingCommand(BaseCommand):
     """Command for greetings and basic interactions"""
     
+    remote_safe = True
+    
     def __init__(self):
         keywords = ["hola", "hello", "hi", "buenos días", "good morning", "buenas tardes", "good afternoon", "buenas noches", "good evening"]
         description = "Responds to greetings"
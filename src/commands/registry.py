@@ -0,0 +1,282 @@
+import asyncio
+import importlib
+import json
+import os
+import threading
+from concurrent.futures import Executor
+from typing import Any, Dict, List, Optional
+
+from .base import BaseCommand, CommandUnavailableError
+
+class LazyCommand(BaseCommand):
+    """
+    Stand-in for a command declared in the manifest. Matching only needs the
+    keywords and description, so the command's module is imported and the
+    real command instantiated the first time it is executed.
+    """
+
+    def __init__(self, name: str, module: str, class_name: Optional[str] = None,
+                 keywords: Optional[List[str]] = None, description: str = "",
+                 needs: Optional[List[str]] = None, dependencies: Optional[Dict[str, Any]] = None,
+                 attributes: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None,
+                 keyword_languages: Optional[Dict[str, List[str]]] = None, side_effect_free: bool = False,
+                 remote_safe: bool = False):
+        self._instance: Optional[BaseCommand] = None
+        self._name = name
+        self.module = module
+        self.class_name = class_name or name
+        # Objects handed to set_<need>() after instantiation, e.g. "processor" -> set_processor
+        self.needs = needs or []
+        self.dependencies = dependencies or {}
+        # Manifest-provided attributes (such as "apps") copied onto the real command
+        self.attributes = attributes or {}
+        self._timeout = timeout
+        self._side_effect_free = side_effect_free
+        self._remote_safe = remote_safe
+        # Set when the import failed, so it is reported once and not retried on every match
+        self._load_error: Optional[str] = None
+        self._lock = threading.Lock()
+        super().__init__(keywords or [], description)
+        self.keyword_languages = keyword_languages or {}
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def loaded(self) -> bool:
+        return self._instance is not None
+
+    @property
+    def keywords(self) -> List[str]:
+        return self._keywords
+
+    @keywords.setter
+    def keywords(self, keywords: List[str]):
+        self._keywords = keywords
+        if self._instance:
+            self._instance.keywords = keywords
+
+    @property
+    def keyword_languages(self) -> Dict[str, List[str]]:
+        return self._keyword_languages
+
+    @keyword_languages.setter
+    def keyword_languages(self, languages: Dict[str, List[str]]):
+        self._keyword_languages = languages
+        if self._instance:
+            self._instance.keyword_languages = languages
+
+    @property
+    def description(self) -> str:
+        return self._description
+
+    @description.setter
+    def description(self, description: str):
+        self._description = description
+        if self._instance:
+            self._instance.description = description
+
+    @property
+    def timeout(self) -> Optional[float]:
+        if self._instance and self._timeout is None:
+            return self._instance.timeout
+        return self._timeout
+
+    @property
+    def side_effect_free(self) -> bool:
+        # Declared in the manifest so speculation doesn't have to import the command
+        if self._instance:
+            return self._instance.side_effect_free
+        return self._side_effect_free
+
+    @property
+    def remote_safe(self) -> bool:
+        if self._instance:
+            return self._instance.remote_safe
+        return self._remote_safe
+
+    def configure(self, **attributes) -> bool:
+        """Set manifest attributes, on the real command too if loaded. Returns True if anything changed."""
+        changed = {key: value for key, value in attributes.items() if self.attributes.get(key) != value}
+        self.attributes = {**self.attributes, **changed}
+        if self._instance:
+            for key, value in changed.items():
+                setattr(self._instance, key, value)
+        return bool(changed)
+
+    def load(self) -> BaseCommand:
+        """Import and instantiate the real command, once. Raises CommandUnavailableError if that failed."""
+        if self._instance:
+            return self._instance
+        with self._lock:
+            if self._instance:
+                return self._instance
+            if self._load_error:
+                raise CommandUnavailableError(self._load_error)
+
+            try:
+                command_class = getattr(importlib.import_module(self.module), self.class_name)
+            except (ImportError, AttributeError) as e:
+                print(f"Could not load {self.module}.{self.class_name}: {e}")
+                self._load_error = f"Command '{self.name}' is not available"
+                raise CommandUnavailableError(self._load_error) from e
+            instance = command_class()
+            for need in self.needs:
+                getattr(instance, f"set_{need}")(self.dependencies.get(need))
+            instance.keywords = self._keywords
+            instance.keyword_languages = self._keyword_languages
+            instance.description = self._description
+            for key, value in self.attributes.items():
+                setattr(instance, key, value)
+
+            self._instance = instance
+            return instance
+
+    def execute(self, command_text: str) -> str:
+        return self.load().execute(command_text)
+
+    async def execute_async(self, command_text: str, executor: Optional[Executor] = None) -> str:
+        if not self._instance:
+            # Import off the event loop; a failed load raises CommandUnavailableError
+            await asyncio.get_running_loop().run_in_executor(executor, self.load)
+        return await self._instance.execute_async(command_text, executor)
+
+class KeywordRegistry:
+    """
+    Loads the command manifest (a JSON file) and applies it to a running
+    CommandProcessor.
+
+    "keywords" is a list, or an object mapping language codes to lists to
+    tag keywords for per-language matching. Entries with a "module" are
+    registered as LazyCommands; "needs" names the
+    dependencies passed to their set_<need>() methods, and entries whose
+    needs are not provided are skipped. The file is polled for changes; on
+    reload only the keywords that were added or removed are pushed to the
+    processor, which updates its derived index entry by entry instead of
+    rebuilding it.
+    """
+
+    def __init__(self, processor, path: str, poll_interval: float = 1.0,
+                 dependencies: Optional[Dict[str, Any]] = None):
+        self.processor = processor
+        self.path = path
+        self.poll_interval = poll_interval
+        self.dependencies = dependencies or {}
+        self.mtime = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def load(self) -> Optional[List[str]]:
+        """Read the file and apply it. Returns a list of changes, or None on error."""
+        try:
+            mtime = os.stat(self.path).st_mtime
+            with open(self.path, "r", encoding="utf-8") as f:
+                config = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Could not load {self.path}: {e}")
+            return None
+
+        self.mtime = mtime
+        return self.apply(config)
+
+    def apply(self, config: Dict) -> List[str]:
+        """Apply a parsed config to the processor's commands"""
+        commands = {command.name: command for command in self.processor.commands}
+        changes = []
+
+        for entry in config.get("commands", []):
+            name = entry.get("name")
+            command = commands.get(name)
+            if command is None:
+                if not entry.get("module"):
+                    print(f"⚠️  {self.path}: unknown command '{name}'")
+                elif all(need in self.dependencies for need in entry.get("needs", [])):
+                    self.processor.register_command(self._lazy_command(entry))
+                    changes.append(f"{name} (added)")
+                continue
+
+            keywords, languages = self._parse_keywords(entry)
+            if keywords is not None and (keywords != command.keywords or languages != command.keyword_languages):
+                added = len(set(keywords) - set(command.keywords))
+                removed = len(set(command.keywords) - set(keywords))
+                self.processor.update_keywords(command, keywords, languages)
+                changes.append(f"{name} (+{added}/-{removed} keywords)")
+
+            description = entry.get("description")
+            if description is not None and description != command.description:
+                self.processor.update_description(command, description)
+                changes.append(f"{name} (description)")
+
+            apps = entry.get("apps")
+            if apps is not None:
+                if isinstance(command, LazyCommand):
+                    if command.configure(apps=apps):
+                        changes.append(f"{name} (apps)")
+                elif hasattr(command, "apps") and apps != command.apps:
+                    command.apps = apps
+                    changes.append(f"{name} (apps)")
+
+        return changes
+
+    def _lazy_command(self, entry: Dict) -> LazyCommand:
+        attributes = {"apps": entry["apps"]} if "apps" in entry else {}
+        keywords, languages = self._parse_keywords(entry)
+        return LazyCommand(
+            entry["name"], entry["module"], entry.get("class"),
+            keywords=keywords, description=entry.get("description", ""),
+            needs=entry.get("needs", []), dependencies=self.dependencies,
+            attributes=attributes, timeout=entry.get("timeout"),
+            keyword_languages=languages, side_effect_free=entry.get("side_effect_free", False),
+            remote_safe=entry.get("remote_safe", False)
+        )
+
+    @staticmethod
+    def _parse_keywords(entry: Dict):
+        """Returns (keywords, keyword -> language codes) for a list or a {language: [keywords]} object"""
+        keywords = entry.get("keywords")
+        if not isinstance(keywords, dict):
+            return keywords, {}
+
+        flat, languages = [], {}
+        for language, language_keywords in keywords.items():
+            for keyword in language_keywords:
+                if keyword not in languages:
+                    flat.append(keyword)
+                languages.setdefault(keyword, []).append(language)
+        return flat, languages
+
+    def check(self) -> bool:
+        """Reload if the file changed since the last load. Returns True if it reloaded."""
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return False
+        if mtime == self.mtime:
+            return False
+
+        changes = self.load()
+        if changes:
+            print(f"🔄 Reloaded {os.path.basename(self.path)}: {', '.join(changes)}")
+        return changes is not None
+
+    def start_watching(self):
+        """Poll the file for changes from a daemon thread"""
+        if self._thread:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="keyword-registry", daemon=True)
+        self._thread.start()
+
+    def stop_watching(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.poll_interval * 2)
+            self._thread = None
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Error reloading {self.path}: {e}")
@@ -0,0 +1,38 @@
+import contextvars
+from contextlib import contextmanager
+from typing import Optional
+
+class Session:
+    """Per-client conversation state (one per microphone or network client)"""
+
+    def __init__(self, session_id: str = "local"):
+        self.id = session_id
+        self.last_response = ""
+        # Whether the client wants responses spoken (used when speech happens client-side)
+        self.tts_enabled = True
+        # SpeculativeSession for the utterance being streamed, if any
+        self.speculation = None
+        # May run commands that act on this machine; False for unauthenticated network clients
+        self.trusted = True
+
+# The session of the utterance being processed. Context variables follow
+# asyncio tasks, and CommandProcessor copies the context into worker threads.
+_current_session = contextvars.ContextVar("current_session", default=None)
+
+DEFAULT_SESSION = Session()
+
+def get_current_session() -> Session:
+    """Session of the utterance being processed, or the default local session"""
+    return _current_session.get() or DEFAULT_SESSION
+
+@contextmanager
+def session_scope(session: Optional[Session]):
+    """Make session current for the enclosed block (no-op for None)"""
+    if session is None:
+        yield
+        return
+    token = _current_session.set(session)
+    try:
+        yield
+    finally:
+        _current_session.reset(token)
@@ -0,0 +1,112 @@
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+class SpeculativeSession:
+    """
+    Resolves the probable intent of one utterance while partial transcripts
+    arrive, so the final transcript mostly finds its work already done.
+
+    Segment resolutions are memoized, so each longer prefix only resolves
+    the segments that changed. Side-effect-free commands are executed as
+    soon as they resolve, on the processor's small speculation pool so they
+    never hold up real commands; commit() reuses those results when the
+    final text resolves the same way, and discards them otherwise.
+    """
+
+    def __init__(self, processor, language: Optional[str] = None, language_confidence: float = 1.0,
+                 max_age: float = 2.0, max_prepared: int = 8):
+        self.processor = processor
+        self.language = language
+        self.language_confidence = language_confidence
+        # Prepared results older than this are re-executed (e.g. the time moved on)
+        self.max_age = max_age
+        self.max_prepared = max_prepared
+        # segment text -> match, shared with CommandProcessor._plan
+        self.memo: Dict[str, Optional[Tuple]] = {}
+        # (command name, segment text) -> (started, future of the command result)
+        self.prepared: Dict[Tuple[str, str], Tuple[float, Future]] = {}
+        self.last_text = None
+        self.last_plan: List[Tuple[str, Optional[Tuple]]] = []
+        # Partials may be fed from worker threads while the final transcript commits
+        self.lock = threading.Lock()
+        # Set by commit: partials arriving after the final transcript are ignored
+        self.closed = False
+
+    def feed_partial(self, text: str) -> Optional[str]:
+        """
+        Resolve a partial transcript. Returns the probable intent ("A+B" when compound), if any.
+        Call within the client's session_scope; speculative commands run in that context.
+        """
+        with self.lock:
+            if self.closed:
+                return None
+            if text != self.last_text:
+                self.last_plan = self.processor.resolve_text(text, self.language, self.language_confidence,
+                                                             memo=self.memo)
+                self.last_text = text
+                for segment, match in self.last_plan:
+                    if match and match[0].side_effect_free:
+                        self._prepare(segment, match)
+
+            names = [match[0].name for _, match in self.last_plan if match]
+        return "+".join(names) if names else None
+
+    def _prepare(self, segment: str, match: Tuple):
+        command = match[0]
+        key = (command.name, segment)
+        if key in self.prepared or len(self.prepared) >= self.max_prepared:
+            return
+        future = self.processor.speculation_executor.submit(contextvars.copy_context().run, command.execute, segment)
+        self.prepared[key] = (time.monotonic(), future)
+
+    def take(self, command, segment: str) -> Optional[Future]:
+        """Prepared result for a command and segment, if fresh. Called by CommandProcessor."""
+        with self.lock:
+            entry = self.prepared.pop((command.name, segment), None)
+        if not entry:
+            return None
+        started, future = entry
+        if time.monotonic() - started > self.max_age:
+            future.cancel()
+            return None
+        self.processor.metrics.increment("speculation_hits")
+        return future
+
+    def commit(self, text: str, session=None) -> Optional[str]:
+        """Process the final transcript, reusing prepared work where it still applies"""
+        self._close()
+        response = self.processor.process_text(text, session, self.language, self.language_confidence,
+                                               speculation=self)
+        self.discard()
+        return response
+
+    async def commit_async(self, text: str, session=None) -> Optional[str]:
+        """Async version of commit"""
+        # Waiting for a partial still resolving must not block the event loop
+        await asyncio.get_running_loop().run_in_executor(self.processor.executor, self._close)
+        response = await self.processor.process_text_async(text, session, self.language, self.language_confidence,
+                                                           speculation=self)
+        self.discard()
+        return response
+
+    def _close(self):
+        """Stop accepting partials; waits for one being resolved so the memo is complete"""
+        with self.lock:
+            self.closed = True
+
+    def discard(self):
+        """Drop prepared work that was not used"""
+        with self.lock:
+            prepared, self.prepared = self.prepared, {}
+            self.memo = {}
+            self.last_text = None
+            self.last_plan = []
+        for _, future in prepared.values():
+            # Only queued jobs can be cancelled; running ones finish on the speculation pool
+            future.cancel()
+        if prepared:
+            self.processor.metrics.increment("speculation_discarded", len(prepared))
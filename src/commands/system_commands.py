@@ -1,6 +1,7 @@
 import subprocess
 import platform
 from .base import BaseCommand
+from audio.mixer import MixerError, create_mixer
 
 class SystemCommand(BaseCommand):
     """Command for system operations"""
@@ -38,50 +39,77 @@ class SystemCommand(BaseCommand):
 class VolumeCommand(BaseCommand):
     """Command to control system volume"""
     
-    def __init__(self):
+    STEP = 10  # Percent per "subir/bajar volumen"
+    
+    def __init__(self, mixer=None):
         keywords = ["volumen", "volume", "subir volumen", "bajar volumen", "silencio", "mute"]
         description = "Controls system volume"
         super().__init__(keywords, description)
+        # Coalesced volume changes that failed after the response was given
+        self.failed_changes = 0
+        self.mixer = None
+        self._mixer_checked = False
+        if mixer is not None:
+            self.set_mixer(mixer)
+    
+    def set_mixer(self, mixer):
+        """Set the mixer reference (e.g. a FakeMixer-backed Mixer in tests)"""
+        if mixer is not None and getattr(mixer, "on_error", False) is None:
+            mixer.on_error = self._change_failed
+        self.mixer = mixer
+        self._mixer_checked = True
+    
+    def _get_mixer(self):
+        """Create the OS mixer session on first use"""
+        if not self._mixer_checked:
+            self.mixer = create_mixer(on_error=self._change_failed)
+            self._mixer_checked = True
+        return self.mixer
+    
+    def _change_failed(self, delta: int):
+        """A coalesced change failed in the background; the next change is then applied synchronously"""
+        self.failed_changes += 1
+        print(f"⚠️  Volume change of {delta:+d}% could not be applied")
     
     def execute(self, command_text: str) -> str:
-        os_name = platform.system()
         command_lower = command_text.lower()
+        mixer = self._get_mixer()
+        
+        if not mixer:
+            if platform.system() == "Windows":
+                return "Volume control not implemented for Windows yet"
+            return "Volume control not available on this system"
         
         try:
             if "subir" in command_lower or "up" in command_lower:
-                if os_name == "Windows":
-                    # Windows volume control would need additional libraries
-                    return "Volume control not implemented for Windows yet"
-                elif os_name == "Darwin":  # macOS
-                    subprocess.run(["osascript", "-e", "set volume output volume (output volume of (get volume settings) + 10)"], check=True)
-                    return "Volume increased"
-                elif os_name == "Linux":
-                    subprocess.run(["amixer", "set", "Master", "10%+"], check=True)
-                    return "Volume increased"
+                if not mixer.change_volume(self.STEP):
+                    return "Error controlling volume"
+                return self._with_level("Volume increased", mixer)
             
             elif "bajar" in command_lower or "down" in command_lower:
-                if os_name == "Windows":
-                    return "Volume control not implemented for Windows yet"
-                elif os_name == "Darwin":  # macOS
-                    subprocess.run(["osascript", "-e", "set volume output volume (output volume of (get volume settings) - 10)"], check=True)
-                    return "Volume decreased"
-                elif os_name == "Linux":
-                    subprocess.run(["amixer", "set", "Master", "10%-"], check=True)
-                    return "Volume decreased"
+                if not mixer.change_volume(-self.STEP):
+                    return "Error controlling volume"
+                return self._with_level("Volume decreased", mixer)
             
             elif "silencio" in command_lower or "mute" in command_lower:
-                if os_name == "Windows":
-                    return "Mute control not implemented for Windows yet"
-                elif os_name == "Darwin":  # macOS
-                    subprocess.run(["osascript", "-e", "set volume with output muted"], check=True)
-                    return "Audio muted"
-                elif os_name == "Linux":
-                    subprocess.run(["amixer", "set", "Master", "toggle"], check=True)
+                try:
+                    muted = mixer.mute()
+                except MixerError as e:
+                    print(f"Error controlling volume: {e}")
+                    return "Error controlling volume"
+                if muted is None:
                     return "Audio toggled"
+                return "Audio muted" if muted else "Audio unmuted"
             
+            level = mixer.get_level()
+            if level is not None:
+                return f"Current volume: {level}%"
             return "Volume command not recognized"
             
-        except subprocess.CalledProcessError as e:
-            return f"Error controlling volume: {e}"
         except Exception as e:
-            return f"Unexpected error: {e}"
\ No newline at end of file
+            return f"Unexpected error: {e}"
+    
+    def _with_level(self, message: str, mixer) -> str:
+        """Append the (possibly still pending) level when it is known"""
+        level = mixer.get_level()
+        return f"{message} ({level}%)" if level is not None else message
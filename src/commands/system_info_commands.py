@@ -6,8 +6,10 @@ from datetime import datetime, timedelta
 class StatsCommand(BaseCommand):
     """Command to show assistant statistics"""
     
+    remote_safe = True
+    
     def __init__(self, command_processor=None):
-        keywords = ["estadísticas", "stats", "statistics", "rendimiento", "performance"]
+        keywords = ["estadísticas", "stats", "statistics", "rendimiento", "performance", "latencia", "latency", "historial", "history"]
         description = "Shows assistant usage statistics"
         super().__init__(keywords, description)
         self.command_processor = command_processor
@@ -20,6 +22,13 @@ class StatsCommand(BaseCommand):
         if not self.command_processor:
             return "Statistics not available"
         
+        command_lower = command_text.lower()
+        if "latencia" in command_lower or "latency" in command_lower:
+            return self._latency_report()
+        
+        if "historial" in command_lower or "history" in command_lower:
+            return self._history_report()
+        
         stats = self.command_processor.get_stats()
         
         if stats['total_commands'] == 0:
@@ -36,11 +45,125 @@ class StatsCommand(BaseCommand):
         result += f"Failed matches: {stats['failed_matches']} ({failed_percent:.1f}%)\n"
         result += f"Success rate: {100 - failed_percent:.1f}%"
         
+        if stats.get('corrections_applied'):
+            result += f"\nLearned corrections applied: {stats['corrections_applied']}"
+        
+        if stats.get('language_fallbacks'):
+            result += f"\nLanguage fallbacks (all keywords searched): {stats['language_fallbacks']}"
+        
+        if stats.get('refused_remote'):
+            result += f"\nRefused for unauthenticated clients: {stats['refused_remote']}"
+        
+        metrics = self.command_processor.metrics
+        snr = []
+        for outcome in ("matched", "failed"):
+            histogram = metrics.snr_histogram(outcome)
+            if histogram and histogram.count:
+                snr.append(f"{histogram.mean():.1f} dB {outcome}")
+        if snr:
+            result += f"\nAverage audio SNR: {', '.join(snr)}"
+        
         return result
+    
+    def _history_report(self) -> str:
+        """Totals across restarts from the durable stats store"""
+        store = self.command_processor.stats_store
+        if not store:
+            return "History not available (no stats store configured)"
+        
+        store.flush()
+        totals = store.totals()
+        total = sum(count for match_type, count in totals.items() if match_type != "ignored")
+        if total == 0:
+            return "No history recorded yet"
+        
+        failed = totals.get("failed", 0)
+        week = store.totals(days=7)
+        week_total = sum(count for match_type, count in week.items() if match_type != "ignored")
+        
+        result = "=== Assistant History ===\n"
+        result += f"All time: {total} commands, {(total - failed) / total * 100:.1f}% recognized\n"
+        result += f"Last 7 days: {week_total} commands\n"
+        
+        top = store.top_commands(limit=3)
+        if top:
+            result += "Most used: " + ", ".join(f"{command} ({count})" for command, count, _ in top) + "\n"
+        
+        bands = store.failures_by_snr()
+        if bands:
+            result += "Failed by audio SNR: " + ", ".join(
+                f"{band} {failed / count * 100:.0f}% of {count}" for band, count, failed in bands
+            )
+        
+        return result.rstrip("\n")
+    
+    def _latency_report(self) -> str:
+        """p50/p95/p99 per pipeline stage and per command, in milliseconds"""
+        metrics = self.command_processor.metrics
+        stages = metrics.summary()
+        
+        if not stages:
+            return "No latency data yet"
+        
+        lines = ["=== Latency (p50 / p95 / p99) ==="]
+        ordered = [s for s in metrics.STAGES if s in stages] + [s for s in stages if s not in metrics.STAGES]
+        for stage in ordered:
+            info = stages[stage]
+            lines.append(f"{stage}: {info['p50'] * 1000:.2f} / {info['p95'] * 1000:.2f} / "
+                         f"{info['p99'] * 1000:.2f} ms ({info['count']} samples)")
+        
+        command_lines = []
+        for command in metrics.commands():
+            info = metrics.summary(command).get("execute")
+            if info:
+                command_lines.append(f"{command}: {info['p50'] * 1000:.2f} / {info['p95'] * 1000:.2f} / "
+                                     f"{info['p99'] * 1000:.2f} ms")
+        if command_lines:
+            lines.append("Per command (execute):")
+            lines.extend(command_lines)
+        
+        return "\n".join(lines)
+
+class ProfileCommand(BaseCommand):
+    """Command to turn on-demand profiling on and off"""
+    
+    def __init__(self, profiler=None):
+        keywords = ["perfilador", "perfilado", "profiler", "profiling"]
+        description = "Starts or stops performance profiling"
+        super().__init__(keywords, description)
+        self.profiler = profiler
+    
+    def set_profiler(self, profiler):
+        """Set the profiler reference"""
+        self.profiler = profiler
+    
+    def execute(self, command_text: str) -> str:
+        if not self.profiler:
+            return "Profiler not available"
+        
+        command_lower = command_text.lower()
+        
+        # Check "desactivar" before "activar", it contains it
+        if any(word in command_lower for word in ["desactivar", "detener", "parar", "disable", "stop"]):
+            if not self.profiler.enabled:
+                return "Profiling is not running"
+            paths = self.profiler.disable()
+            if paths:
+                return f"Profiling stopped. Results: {', '.join(paths)}"
+            return f"Profiling stopped. Results will be written to {self.profiler.output_dir}"
+        
+        elif any(word in command_lower for word in ["activar", "iniciar", "enable", "start"]):
+            if self.profiler.enable():
+                return "Profiling started"
+            return "Profiling is already running"
+        
+        return self.profiler.status()
 
 class SystemInfoCommand(BaseCommand):
     """Command to show system information"""
     
+    remote_safe = True
+    
     def __init__(self):
         keywords = ["sistema", "system", "info", "información del sistema", "system info"]
         description = "Shows system information"
@@ -81,6 +204,8 @@ class SystemInfoCommand(BaseCommand):
 class UptimeCommand(BaseCommand):
     """Command to show system uptime"""
     
+    remote_safe = True
+    
     def __init__(self):
         keywords = ["uptime", "tiempo encendido", "cuánto tiempo", "how long"]
         description = "Shows system uptime"
@@ -125,6 +250,8 @@ class UptimeCommand(BaseCommand):
 class TestFuzzyCommand(BaseCommand):
     """Command to test fuzzy matching capabilities"""
     
+    remote_safe = True
+    
     def __init__(self):
         keywords = ["test fuzzy", "probar fuzzy", "test detection", "probar detección"]
         description = "Tests fuzzy matching detection"
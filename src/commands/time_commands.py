@@ -4,6 +4,9 @@ from .base import BaseCommand
 class TimeCommand(BaseCommand):
     """Command to get current time"""
     
+    side_effect_free = True
+    remote_safe = True
+    
     def __init__(self):
         keywords = ["hora", "time", "qué hora es", "what time"]
         description = "Gets the current time"
@@ -17,6 +20,9 @@ class TimeCommand(BaseCommand):
 class DateCommand(BaseCommand):
     """Command to get current date"""
     
+    side_effect_free = True
+    remote_safe = True
+    
     def __init__(self):
         keywords = ["fecha", "date", "qué fecha", "what date", "hoy", "today"]
         description = "Gets the current date"
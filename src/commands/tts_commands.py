@@ -1,8 +1,11 @@
 from .base import BaseCommand
+from .session import get_current_session
 
 class TTSControlCommand(BaseCommand):
     """Command to control Text-to-Speech settings"""
     
+    remote_safe = True
+    
     def __init__(self, tts_engine=None):
         keywords = ["voz", "voice", "hablar", "speak", "silenciar voz", "mute voice", "activar voz", "enable voice"]
         description = "Controls text-to-speech voice output"
@@ -14,11 +17,12 @@ class TTSControlCommand(BaseCommand):
         self.tts_engine = tts_engine
     
     def execute(self, command_text: str) -> str:
-        if not self.tts_engine:
-            return "TTS engine not available"
-        
         command_lower = command_text.lower()
         
+        if not self.tts_engine:
+            # Server mode: speech happens on the client, so only the session preference changes
+            return self._set_session_preference(command_lower)
+        
         if any(word in command_lower for word in ["silenciar", "mute", "desactivar", "disable"]):
             if self.tts_engine.enabled:
                 self.tts_engine.toggle()
@@ -44,24 +48,47 @@ class TTSControlCommand(BaseCommand):
                 return "Voice test failed"
         
         return "Voice command not recognized. Try: 'activar voz', 'silenciar voz', 'estado voz', or 'prueba voz'"
+    
+    def _set_session_preference(self, command_lower: str) -> str:
+        """Toggle voice output for the current session only"""
+        session = get_current_session()
+        
+        if any(word in command_lower for word in ["silenciar", "mute", "desactivar", "disable"]):
+            session.tts_enabled = False
+            return "Voice output disabled"
+        
+        elif any(word in command_lower for word in ["activar", "enable", "encender", "turn on"]):
+            session.tts_enabled = True
+            return "Voice output enabled"
+        
+        elif any(word in command_lower for word in ["estado", "status", "info"]):
+            return f"Voice output {'enabled' if session.tts_enabled else 'disabled'} for this client"
+        
+        return "TTS engine not available"
 
 class RepeatCommand(BaseCommand):
     """Command to repeat the last response"""
     
+    remote_safe = True
+    
     def __init__(self, tts_engine=None):
         keywords = ["repite", "repeat", "di otra vez", "say again"]
         description = "Repeats the last response"
         super().__init__(keywords, description)
         self.tts_engine = tts_engine
-        self.last_response = ""
     
     def set_tts_engine(self, tts_engine):
         """Set the TTS engine reference"""
         self.tts_engine = tts_engine
     
+    @property
+    def last_response(self) -> str:
+        """Last response of the current session"""
+        return get_current_session().last_response
+    
     def set_last_response(self, response: str):
-        """Set the last response to be repeated"""
-        self.last_response = response
+        """Set the last response to be repeated (for the current session)"""
+        get_current_session().last_response = response
     
     def execute(self, command_text: str) -> str:
         if not self.last_response:
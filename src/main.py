@@ -1,55 +1,69 @@
+from contextlib import nullcontext
+
 from audio.recorder import AudioRecorder
 from audio.transcriber import AudioTranscriber
 from audio.tts import TextToSpeech
-from commands.base import CommandProcessor
-from commands.time_commands import TimeCommand, DateCommand
-from commands.app_commands import AppLauncherCommand
-from commands.system_commands import SystemCommand, VolumeCommand
-from commands.help_commands import HelpCommand, GreetingCommand
-from commands.tts_commands import TTSControlCommand, RepeatCommand
-from commands.system_info_commands import StatsCommand, SystemInfoCommand, UptimeCommand, TestFuzzyCommand
+from assistant import build_processor
+from utils.profiler import Profiler
+from utils.stats_store import StatsStore
+from utils.corrections import CorrectionTable
 
 def main():
     # Configuration
     ACTIVATION_WORDS = ["furina", "purina"]
     FUZZY_THRESHOLD = 60.0  # Minimum similarity for fuzzy matching
+    METRICS_PORT = None  # e.g. 9464 to serve Prometheus metrics on localhost
+    STATS_DB = "assistant_stats.db"  # Durable utterance log, survives restarts
+    CORRECTIONS_FILE = "corrections.json"  # Learned misrecognition rewrites
+    CAPTURE_PROCESS = False  # Capture audio in a separate process through shared memory (needs numpy)
+    BARGE_IN = False  # Stop speaking when the user talks over the assistant (needs numpy)
+    AUDIO_DSP = False  # Noise suppression and automatic gain before transcription (needs numpy)
     
     # Initialize components
-    recorder = AudioRecorder(duration=5)
+    if CAPTURE_PROCESS:
+        from audio.ring_buffer import RingRecorder
+        recorder = RingRecorder(duration=5)
+        if not recorder.start():
+            print("⚠️  Falling back to in-process audio capture")
+            recorder.close()
+            recorder = AudioRecorder(duration=5)
+            CAPTURE_PROCESS = False
+    else:
+        recorder = AudioRecorder(duration=5)
+    if AUDIO_DSP:
+        from audio.dsp import AudioConditioner
+        recorder.set_dsp(AudioConditioner())
     transcriber = AudioTranscriber()
     tts = TextToSpeech(prefer_pyttsx=False)  # Use system TTS first
-    processor = CommandProcessor(ACTIVATION_WORDS, fuzzy_threshold=FUZZY_THRESHOLD)
-    
-    # Register basic commands
-    processor.register_command(TimeCommand())
-    processor.register_command(DateCommand())
-    processor.register_command(AppLauncherCommand())
-    processor.register_command(SystemCommand())
-    processor.register_command(VolumeCommand())
-    processor.register_command(GreetingCommand())
-    
-    # System info commands
-    processor.register_command(SystemInfoCommand())
-    processor.register_command(UptimeCommand())
-    processor.register_command(TestFuzzyCommand())
-    
-    # TTS-related commands
-    tts_control = TTSControlCommand()
-    tts_control.set_tts_engine(tts)
-    processor.register_command(tts_control)
+    # On-demand profiling ("Furina activar perfilador" or kill -USR1 <pid>)
+    profiler = Profiler(output_dir="profiles")
+    processor = build_processor(tts, ACTIVATION_WORDS, fuzzy_threshold=FUZZY_THRESHOLD, watch_config=True,
+                                dependencies={"profiler": profiler})
+    stats_store = StatsStore(STATS_DB)
+    processor.set_stats_store(stats_store)
+    corrections = CorrectionTable(CORRECTIONS_FILE)
+    processor.set_correction_table(corrections)
+    if CAPTURE_PROCESS:
+        # Dropped and overflowed frames show up next to the latency metrics
+        recorder.set_metrics(processor.metrics)
+    barge_in = None
+    if BARGE_IN:
+        from audio.barge_in import BargeInMonitor, MicrophoneFrames, RingFrames
+        source = RingFrames(recorder.reader) if CAPTURE_PROCESS else MicrophoneFrames(recorder.samplerate)
+        barge_in = BargeInMonitor(tts, source, metrics=processor.metrics)
     
-    repeat_cmd = RepeatCommand()
-    repeat_cmd.set_tts_engine(tts)
-    processor.register_command(repeat_cmd)
+    profiler.watch(processor, "process_text")
+    profiler.watch(processor.fuzzy_matcher, "find_command_match")
+    profiler.watch(processor.fuzzy_matcher, "suggest_corrections")
+    profiler.watch(recorder, "record_audio")
+    profiler.watch(transcriber, "transcribe_with_language")
+    profiler.watch(tts, "speak")
+    profiler.install_signal_handler()
     
-    # Commands that need processor reference
-    help_cmd = HelpCommand()
-    help_cmd.set_processor(processor)
-    processor.register_command(help_cmd)
-    
-    stats_cmd = StatsCommand()
-    stats_cmd.set_processor(processor)
-    processor.register_command(stats_cmd)
+    metrics = processor.metrics
+    if METRICS_PORT:
+        metrics.start_http_server(METRICS_PORT)
+        print(f"📈 Metrics at http://127.0.0.1:{METRICS_PORT}/metrics")
     
     print("=== Voice Assistant with Enhanced Detection ===")
     print("Activation words:", ACTIVATION_WORDS)
@@ -57,31 +71,33 @@ def main():
     print(f"Fuzzy matching threshold: {FUZZY_THRESHOLD}%")
     print(f"TTS Status: {tts.get_engine_info()}")
     print("\n🎯 Try saying commands with small errors to test fuzzy matching!")
-    print("📊 Say 'Furina estadísticas' to see detection stats")
+    print("📊 Say 'Furina estadísticas' to see detection stats ('Furina latencia' for timings)")
     print("🧪 Say 'Furina test fuzzy' for fuzzy matching examples")
     print("\nPress Enter to start recording...")
     
-    last_response = ""
-    
+    listen_now = False
+    pre_roll = None
     while True:
         try:
-            input()  # Wait for Enter
+            if not listen_now:
+                input()  # Wait for Enter
+            listen_now = False
             
-            # Record audio
-            filename = recorder.record_audio()
+            # Record audio (after a barge-in, starting with what was said over the assistant)
+            with metrics.time("record"):
+                filename = recorder.record_audio(pre_roll)
+            pre_roll = None
             
             # Transcribe
-            text = transcriber.transcribe_audio(filename)
+            with metrics.time("transcribe"):
+                text, language, confidence = transcriber.transcribe_with_language(filename)
             
             if text:
-                # Process command
-                result = processor.process_text(text)
+                # Process command (also stores the response for the repeat command)
+                result = processor.process_text(text, language=language, language_confidence=confidence,
+                                                snr_db=recorder.last_snr_db)
                 print(f"Result: {result}")
                 
-                # Store last response for repeat command
-                last_response = result
-                repeat_cmd.set_last_response(last_response)
-                
                 # Speak the result if TTS is enabled
                 if tts.is_enabled():
                     # Clean up the text for better speech
@@ -89,7 +105,13 @@ def main():
                     if speech_text.startswith("Result: "):
                         speech_text = speech_text[8:]  # Remove "Result: " prefix
                     
-                    tts.speak(speech_text)
+                    with metrics.time("speak"), barge_in.listening() if barge_in else nullcontext():
+                        tts.speak(speech_text)
+                    if tts.interrupted:
+                        # The user started talking over us: record right away
+                        print("🛑 Interrupted, listening...")
+                        listen_now = True
+                        pre_roll = barge_in.pre_roll
                 
             else:
                 error_msg = "Could not transcribe audio."
@@ -101,6 +123,10 @@ def main():
             print("\nExiting assistant...")
             if tts.is_enabled():
                 tts.speak("Goodbye!")
+            stats_store.close()
+            corrections.save()
+            if CAPTURE_PROCESS:
+                recorder.close()
             break
         except Exception as e:
             error_msg = f"Error: {e}"
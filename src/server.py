@@ -0,0 +1,414 @@
+"""
+Network server mode: one warm CommandProcessor shared by many thin clients.
+
+Endpoints (HTTP/1.1 with keep-alive and request pipelining):
+    POST /transcript   JSON {"text": "...", "client_id": "...", "language": "es"}
+                       add "partial": true for interim transcripts of an utterance
+    POST /audio        WAV body, client id in the X-Client-Id header
+    GET  /ws           WebSocket; each text frame is a /transcript JSON body
+    GET  /health
+    GET  /metrics      Prometheus text format
+
+Commands that act on the server machine (opening apps, volume, power) only
+run for clients sending "Authorization: Bearer <token>" with the token given
+by --token or ASSISTANT_TOKEN; everyone else gets the remote_safe commands.
+
+Run from src/:
+    python server.py --port 8765
+"""
+import argparse
+import asyncio
+import base64
+import contextvars
+import hashlib
+import hmac
+import json
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from assistant import build_processor, ACTIVATION_WORDS, FUZZY_THRESHOLD
+from commands.session import Session, session_scope
+from commands.speculation import SpeculativeSession
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+MAX_BODY_SIZE = 10 * 1024 * 1024  # 10 MB, about 5 minutes of 16 kHz mono audio
+
+class RequestError(Exception):
+    """Malformed or oversized HTTP request, answered with its status before closing the connection"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+class SessionRegistry:
+    """Per-client sessions, least recently used evicted past max_sessions"""
+
+    def __init__(self, max_sessions: int = 10000):
+        self.max_sessions = max_sessions
+        self.sessions: "OrderedDict[Tuple[str, bool], Session]" = OrderedDict()
+
+    def get(self, client_id: str, trusted: bool = False) -> Session:
+        # Authenticated and anonymous clients never share a session, even with the same id
+        key = (client_id, trusted)
+        session = self.sessions.get(key)
+        if session is None:
+            session = Session(client_id)
+            session.trusted = trusted
+            self.sessions[key] = session
+            if len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+        else:
+            self.sessions.move_to_end(key)
+        return session
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+class AssistantServer:
+    """asyncio HTTP/WebSocket front-end for a shared CommandProcessor"""
+
+    def __init__(self, processor, transcriber=None, max_concurrent: int = 32, max_pipeline: int = 16,
+                 auth_token: Optional[str] = None):
+        self.processor = processor
+        self.transcriber = transcriber
+        # Without a token no client may run commands that act on the server machine
+        self.auth_token = auth_token
+        self.sessions = SessionRegistry()
+        # Limits utterances being processed at once across all clients
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        # Limits pipelined requests in flight per connection
+        self.max_pipeline = max_pipeline
+        self.server = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765):
+        self.server = await asyncio.start_server(self._handle_connection, host, port)
+        return self.server
+
+    async def serve_forever(self, host: str = "127.0.0.1", port: int = 8765):
+        server = await self.start(host, port)
+        address = server.sockets[0].getsockname()
+        print(f"🌐 Assistant server listening on http://{address[0]}:{address[1]}")
+        async with server:
+            await server.serve_forever()
+
+    # Request handling
+
+    def _authorized(self, headers: Dict[str, str]) -> bool:
+        """Whether the request carries the server's bearer token"""
+        if not self.auth_token:
+            return False
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+        return scheme.lower() == "bearer" and hmac.compare_digest(token.strip().encode(), self.auth_token.encode())
+
+    async def process(self, text: str, client_id: str, language: Optional[str] = None,
+                      language_confidence: float = 1.0, partial: bool = False, trusted: bool = False) -> Dict:
+        """
+        Run one transcript through the shared processor for a client.
+        Partial transcripts are only resolved speculatively; the next final
+        transcript from the client reuses that work.
+        trusted: the client authenticated, so it may run non-remote_safe commands
+        """
+        session = self.sessions.get(client_id, trusted)
+        if partial:
+            if session.speculation is None:
+                session.speculation = SpeculativeSession(self.processor, language=language,
+                                                         language_confidence=language_confidence)
+            speculation = session.speculation
+            # Speculative jobs copy this context, so they see the client's session
+            with session_scope(session):
+                context = contextvars.copy_context()
+            # Resolving is CPU work: keep it off the event loop and within max_concurrent
+            async with self.semaphore:
+                intent = await asyncio.get_running_loop().run_in_executor(
+                    self.processor.executor, context.run, speculation.feed_partial, text
+                )
+            return {"client_id": client_id, "text": text, "partial": True, "intent": intent}
+
+        speculation, session.speculation = session.speculation, None
+        async with self.semaphore:
+            started = time.perf_counter()
+            if speculation:
+                response = await speculation.commit_async(text, session)
+            else:
+                response = await self.processor.process_text_async(text, session, language, language_confidence)
+        return {
+            "client_id": client_id,
+            "text": text,
+            "response": response,
+            "speak": session.tts_enabled,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+
+    async def process_audio(self, audio: bytes, client_id: str, trusted: bool = False) -> Tuple[int, Dict]:
+        """Transcribe an uploaded WAV file, then process it like a transcript"""
+        if not self.transcriber:
+            return 503, {"error": "Audio transcription not configured"}
+
+        loop = asyncio.get_running_loop()
+        fd, path = tempfile.mkstemp(suffix=".wav")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            with self.processor.metrics.time("transcribe"):
+                text, language, confidence = await loop.run_in_executor(
+                    self.processor.executor, self.transcriber.transcribe_with_language, path
+                )
+        finally:
+            os.remove(path)
+
+        if not text:
+            return 422, {"error": "Could not transcribe audio"}
+        return 200, await self.process(text, client_id, language, confidence, trusted=trusted)
+
+    async def _dispatch(self, method: str, path: str, headers: Dict[str, str], body: bytes) -> Tuple[int, str, bytes]:
+        """Route one HTTP request. Returns (status, content_type, body)"""
+        path = path.split("?")[0]
+        client_id = headers.get("x-client-id", "anonymous")
+        trusted = self._authorized(headers)
+
+        try:
+            if method == "POST" and path == "/transcript":
+                payload = json.loads(body or b"{}")
+                text = payload.get("text")
+                if not isinstance(text, str):
+                    return self._json(400, {"error": "Missing 'text'"})
+                result = await self.process(text, payload.get("client_id") or client_id,
+                                            payload.get("language"), payload.get("language_confidence", 1.0),
+                                            bool(payload.get("partial")), trusted)
+                return self._json(200, result)
+
+            if method == "POST" and path == "/audio":
+                status, result = await self.process_audio(body, client_id, trusted)
+                return self._json(status, result)
+
+            if method == "GET" and path == "/health":
+                return self._json(200, {"status": "ok", "sessions": len(self.sessions)})
+
+            if method == "GET" and path == "/metrics":
+                return 200, "text/plain; version=0.0.4", self.processor.metrics.export_prometheus().encode("utf-8")
+
+            return self._json(404, {"error": "Not found"})
+        except ValueError:
+            return self._json(400, {"error": "Invalid JSON"})
+        except Exception as e:
+            return self._json(500, {"error": str(e)})
+
+    @staticmethod
+    def _json(status: int, payload: Dict) -> Tuple[int, str, bytes]:
+        return status, "application/json", json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+    # HTTP/1.1 connection handling
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # Responses must go out in request order even though requests run concurrently
+        pending: asyncio.Queue = asyncio.Queue(maxsize=self.max_pipeline)
+        sender = asyncio.ensure_future(self._send_responses(pending, writer))
+
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except RequestError as e:
+                    # Answer after the pipelined responses, then close (the body may be unread)
+                    answered = asyncio.get_running_loop().create_future()
+                    answered.set_result(self._json(e.status, {"error": str(e)}))
+                    await pending.put((answered, False))
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+
+                if headers.get("upgrade", "").lower() == "websocket" and path.startswith("/ws"):
+                    # Finish pipelined HTTP responses before switching protocols
+                    await pending.put(None)
+                    await sender
+                    await self._handle_websocket(reader, writer, headers)
+                    return
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await pending.put((asyncio.ensure_future(self._dispatch(method, path, headers, body)), keep_alive))
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+
+        await pending.put(None)
+        try:
+            await sender
+        except ConnectionError:
+            pass
+        writer.close()
+
+    async def _send_responses(self, pending: asyncio.Queue, writer: asyncio.StreamWriter):
+        while True:
+            item = await pending.get()
+            if item is None:
+                return
+            task, keep_alive = item
+            status, content_type, body = await task
+            reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large",
+                      422: "Unprocessable Entity", 500: "Internal Server Error",
+                      503: "Service Unavailable"}.get(status, "OK")
+            head = (
+                f"HTTP/1.1 {status} {reason}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+            )
+            writer.write(head.encode("latin-1") + body)
+            await writer.drain()
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        """Parse one HTTP request. Returns None when the client closes the connection."""
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        request_line = request_line.decode("latin-1").strip()
+        if not request_line:
+            return None
+        parts = request_line.split(" ", 2)
+        if len(parts) != 3:
+            raise RequestError(400, "Malformed request line")
+        method, path, _ = parts
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise RequestError(400, "Invalid Content-Length")
+        if length < 0:
+            raise RequestError(400, "Invalid Content-Length")
+        if length > MAX_BODY_SIZE:
+            raise RequestError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), path, headers, body
+
+    # WebSocket (RFC 6455, text frames only)
+
+    async def _handle_websocket(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, headers: Dict[str, str]):
+        key = headers.get("sec-websocket-key", "")
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()).decode()
+        writer.write(
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n".encode("latin-1")
+        )
+        await writer.drain()
+
+        default_client = headers.get("x-client-id", "anonymous")
+        trusted = self._authorized(headers)
+        send_lock = asyncio.Lock()
+        tasks = set()
+        # Messages in flight per connection, like max_pipeline for HTTP; reading waits for a free slot
+        slots = asyncio.Semaphore(self.max_pipeline)
+
+        async def answer(message: str):
+            try:
+                payload = json.loads(message)
+                result = await self.process(payload["text"], payload.get("client_id") or default_client,
+                                            payload.get("language"), payload.get("language_confidence", 1.0),
+                                            bool(payload.get("partial")), trusted)
+                if "id" in payload:
+                    result["id"] = payload["id"]
+            except (ValueError, KeyError, TypeError):
+                result = {"error": "Expected JSON with 'text'"}
+            try:
+                async with send_lock:
+                    await self._ws_send(writer, 0x1, json.dumps(result, ensure_ascii=False).encode("utf-8"))
+            finally:
+                slots.release()
+
+        try:
+            while True:
+                opcode, payload = await self._ws_read_frame(reader)
+                if opcode == 0x8:  # Close
+                    async with send_lock:
+                        await self._ws_send(writer, 0x8, payload[:2])
+                    break
+                if opcode == 0x9:  # Ping
+                    async with send_lock:
+                        await self._ws_send(writer, 0xA, payload)
+                elif opcode == 0x1:
+                    # Messages are answered concurrently; clients match replies by "id"
+                    await slots.acquire()
+                    task = asyncio.ensure_future(answer(payload.decode("utf-8")))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        writer.close()
+
+    @staticmethod
+    async def _ws_read_frame(reader: asyncio.StreamReader) -> Tuple[int, bytes]:
+        first, second = await reader.readexactly(2)
+        opcode = first & 0x0F
+        length = second & 0x7F
+        if length == 126:
+            length = int.from_bytes(await reader.readexactly(2), "big")
+        elif length == 127:
+            length = int.from_bytes(await reader.readexactly(8), "big")
+        if length > MAX_BODY_SIZE:
+            raise ConnectionError("WebSocket frame too large")
+        mask = await reader.readexactly(4) if second & 0x80 else None
+        payload = await reader.readexactly(length)
+        if mask:
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        return opcode, payload
+
+    @staticmethod
+    async def _ws_send(writer: asyncio.StreamWriter, opcode: int, payload: bytes):
+        header = bytes([0x80 | opcode])
+        length = len(payload)
+        if length < 126:
+            header += bytes([length])
+        elif length < 65536:
+            header += bytes([126]) + length.to_bytes(2, "big")
+        else:
+            header += bytes([127]) + length.to_bytes(8, "big")
+        writer.write(header + payload)
+        await writer.drain()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the voice assistant to network clients")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-concurrent", type=int, default=32, help="Utterances processed at once")
+    parser.add_argument("--workers", type=int, default=8, help="Threads for command execution")
+    parser.add_argument("--audio", action="store_true", help="Accept WAV uploads (needs OPENAI_API_KEY)")
+    parser.add_argument("--token", default=os.environ.get("ASSISTANT_TOKEN"),
+                        help="Bearer token clients need to run commands that act on this machine")
+    args = parser.parse_args()
+
+    transcriber = None
+    if args.audio:
+        from audio.transcriber import AudioTranscriber
+        transcriber = AudioTranscriber()
+
+    # No TTS on the server: clients speak responses themselves
+    processor = build_processor(tts=None, activation_words=ACTIVATION_WORDS, fuzzy_threshold=FUZZY_THRESHOLD,
+                                watch_config=True, max_workers=args.workers)
+    server = AssistantServer(processor, transcriber, max_concurrent=args.max_concurrent, auth_token=args.token)
+
+    try:
+        asyncio.run(server.serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\nServer stopped")
+    finally:
+        processor.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Barge-in latency with synthetic audio: no microphone or speaker needed.
+
+A synthetic frame source plays the assistant's echo (a syllable-modulated
+tone over a noise floor) and, part way through, a louder "user" voice. The
+TTS engine is a subprocess that sleeps for as long as the text would take
+to say, so interrupting it exercises the real stop path. Reports how long
+detection took after the user started talking and the interrupt-to-listen
+latency (detection until speak() returned), plus false triggers on runs
+with echo only. Run from src/:
+
+    python -m tools.barge_in_bench --trials 20 --max-p95-ms 150
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from audio.barge_in import BargeInDetector, BargeInMonitor
+from audio.tts import TextToSpeech, TTSEngine
+from utils.metrics import LatencyHistogram
+
+LONG_TEXT = " ".join(
+    f"Command {i}. Keywords: example, another example, one more. Description: does something useful."
+    for i in range(1, 13)
+)
+
+class SyntheticFrames:
+    """Frame source generating echo, noise and an optional user voice in real time"""
+
+    def __init__(self, barge_in_at: Optional[float], samplerate: int = 16000, frame_size: int = 512,
+                 noise: float = 60.0, echo: float = 1500.0, voice: float = 6000.0, seed: int = 0):
+        self.barge_in_at = barge_in_at
+        self.samplerate = samplerate
+        self.frame_size = frame_size
+        self.noise = noise
+        self.echo = echo
+        self.voice = voice
+        self.rng = np.random.default_rng(seed)
+        self.started = None
+        self.produced = 0
+
+    @property
+    def onset(self) -> Optional[float]:
+        """perf_counter time at which the user starts talking"""
+        if self.barge_in_at is None or self.started is None:
+            return None
+        return self.started + self.barge_in_at
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.produced = 0
+
+    def read(self) -> List[np.ndarray]:
+        due = int((time.perf_counter() - self.started) * self.samplerate / self.frame_size)
+        frames = [self._frame(index) for index in range(self.produced, due)]
+        self.produced = max(self.produced, due)
+        return frames
+
+    def stop(self):
+        pass
+
+    def _frame(self, index: int) -> np.ndarray:
+        t = (index * self.frame_size + np.arange(self.frame_size)) / self.samplerate
+        audio = self.rng.normal(0.0, self.noise, self.frame_size)
+        # The assistant's own voice leaking back: a 180 Hz tone in 4 Hz syllables
+        audio += self.echo * np.abs(np.sin(2 * np.pi * 4 * t)) * np.sin(2 * np.pi * 180 * t)
+        if self.barge_in_at is not None and t[0] >= self.barge_in_at:
+            audio += self.voice * (np.sin(2 * np.pi * 220 * t) + 0.5 * np.sin(2 * np.pi * 440 * t)) / 1.5
+        return np.clip(audio, -32768, 32767).astype(np.int16)
+
+class SleepTTS(TTSEngine):
+    """Engine that 'speaks' by running a subprocess for the text's duration"""
+
+    def __init__(self, chars_per_second: float = 15.0):
+        self.chars_per_second = chars_per_second
+
+    def speak(self, text: str) -> bool:
+        seconds = len(text) / self.chars_per_second
+        return self._run([sys.executable, "-c", f"import time; time.sleep({seconds:.3f})"])
+
+    def is_available(self) -> bool:
+        return True
+
+def run(trials: int, echo_trials: int, options: dict) -> dict:
+    tts = TextToSpeech(engines=[SleepTTS()])
+    detection = LatencyHistogram()
+    interrupt_to_listen = LatencyHistogram()
+    onset_to_listen = LatencyHistogram()
+    missed = false_triggers = 0
+    rng = random.Random(0)
+
+    for trial in range(trials + echo_trials):
+        echo_only = trial >= trials
+        source = SyntheticFrames(None if echo_only else rng.uniform(0.5, 1.5), echo=options["echo"],
+                                 voice=options["voice"], seed=trial)
+        monitor = BargeInMonitor(tts, source, BargeInDetector(ratio=options["ratio"]))
+        # Echo-only runs speak a couple of seconds; others would run far longer than the barge-in
+        text = LONG_TEXT[:40] if echo_only else LONG_TEXT
+        with monitor.listening():
+            tts.speak(text)
+
+        if echo_only:
+            false_triggers += tts.interrupted
+        elif not tts.interrupted:
+            missed += 1
+        else:
+            detection.record(monitor.triggered_at - source.onset)
+            interrupt_to_listen.record(monitor.latency)
+            onset_to_listen.record(monitor.triggered_at - source.onset + monitor.latency)
+
+    def describe(histogram: LatencyHistogram) -> dict:
+        return {
+            "count": histogram.count,
+            "p50_ms": round(histogram.percentile(50) * 1000, 2),
+            "p95_ms": round(histogram.percentile(95) * 1000, 2),
+        }
+
+    return {
+        "trials": trials,
+        "missed": missed,
+        "echo_trials": echo_trials,
+        "false_triggers": false_triggers,
+        "detection": describe(detection),
+        "interrupt_to_listen": describe(interrupt_to_listen),
+        "onset_to_listen": describe(onset_to_listen),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Barge-in latency with synthetic audio")
+    parser.add_argument("--trials", type=int, default=10, help="Runs where the user talks over playback")
+    parser.add_argument("--echo-trials", type=int, default=3, help="Runs with echo only (should not trigger)")
+    parser.add_argument("--echo", type=float, default=1500.0, help="Echo amplitude (int16)")
+    parser.add_argument("--voice", type=float, default=6000.0, help="User voice amplitude (int16)")
+    parser.add_argument("--ratio", type=float, default=2.5, help="Detector ratio over the echo baseline")
+    parser.add_argument("--max-p95-ms", type=float, help="Fail if interrupt-to-listen p95 exceeds this")
+    args = parser.parse_args()
+
+    # TextToSpeech reports engine selection on stdout
+    stdout, sys.stdout = sys.stdout, sys.stderr
+    try:
+        report = run(args.trials, args.echo_trials, {"echo": args.echo, "voice": args.voice, "ratio": args.ratio})
+    finally:
+        sys.stdout = stdout
+    print(json.dumps(report, indent=2))
+
+    if report["missed"] or report["false_triggers"]:
+        sys.exit(1)
+    if args.max_p95_ms is not None and report["interrupt_to_listen"]["p95_ms"] > args.max_p95_ms:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Re-run command resolution over logged transcripts in bulk.
+
+Reads JSONL transcripts ({"id": ..., "text": "...", "language": "es"} or
+plain text lines) from a file or stdin, resolves them on a process pool
+where each worker builds its processor once, and streams one decision per
+line to JSONL in input order. Only a bounded window of chunks is in flight,
+so memory stays flat however large the input is. Run from src/:
+
+    python -m tools.batch transcripts.jsonl -o decisions.jsonl --threshold 65
+    python -m tools.batch transcripts.jsonl -o new.jsonl --diff decisions.jsonl --report diff.json
+
+Commands are only resolved, never executed, unless --execute is given.
+With --diff the new decisions are compared line by line against a previous
+run over the same input and a summary of changed intents is reported.
+"""
+import argparse
+import json
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from assistant import build_processor, COMMANDS_CONFIG, FUZZY_THRESHOLD
+
+def intent_of(plan) -> Optional[str]:
+    """Command names of the resolved segments, "A+B" for compound utterances"""
+    names = [match[0].name for _, match in plan if match]
+    return "+".join(names) if names else None
+
+def read_transcripts(path: str) -> Iterator[Dict]:
+    """Yield transcripts one at a time; ids default to the line number"""
+    f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    try:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError:
+                item = line
+            if not isinstance(item, dict):
+                item = {"text": str(item)}
+            item.setdefault("id", line_number)
+            yield item
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+def chunked(items: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def decide(processor, item: Dict, execute: bool = False) -> Dict:
+    """Resolve one transcript to a decision record"""
+    text = item.get("text") or ""
+    language = item.get("language")
+    confidence = item.get("language_confidence", 1.0)
+    plan = processor.resolve_text(text, language, confidence)
+
+    segments = []
+    for segment, match in plan:
+        if match:
+            command, match_type, match_confidence, keyword = match
+            segments.append({
+                "text": segment,
+                "command": command.name,
+                "match_type": match_type.replace("_matches", ""),
+                "confidence": round(match_confidence, 1),
+                "keyword": keyword,
+            })
+        else:
+            segments.append({"text": segment, "command": None})
+
+    decision = {"id": item["id"], "text": text, "intent": intent_of(plan), "segments": segments}
+    if execute:
+        decision["response"] = processor.process_text(text, language=language, language_confidence=confidence)
+    return decision
+
+class DecisionDiff:
+    """Streams a previous decisions file alongside the new one and counts changed intents"""
+
+    def __init__(self, path: str, max_examples: int = 20):
+        self.file = open(path, "r", encoding="utf-8")
+        self.max_examples = max_examples
+        self.compared = 0
+        self.changed = 0
+        self.misaligned = 0
+        self.added = 0
+        self.transitions = Counter()
+        self.examples = []
+
+    def _next_previous(self) -> Optional[Dict]:
+        for line in self.file:
+            if line.strip():
+                return json.loads(line)
+        return None
+
+    def compare(self, decision: Dict):
+        previous = self._next_previous()
+        if previous is None:
+            self.added += 1
+            return
+        if previous.get("id") != decision["id"]:
+            self.misaligned += 1
+        self.compared += 1
+
+        old, new = previous.get("intent"), decision["intent"]
+        if old != new:
+            self.changed += 1
+            self.transitions[f"{old} -> {new}"] += 1
+            if len(self.examples) < self.max_examples:
+                self.examples.append({"id": decision["id"], "text": decision["text"], "before": old, "after": new})
+
+    def report(self) -> Dict:
+        removed = 0
+        while self._next_previous() is not None:
+            removed += 1
+        self.file.close()
+        return {
+            "compared": self.compared,
+            "changed": self.changed,
+            "changed_percent": round(self.changed / self.compared * 100, 2) if self.compared else 0.0,
+            "misaligned_ids": self.misaligned,
+            "only_in_new": self.added,
+            "only_in_previous": removed,
+            "transitions": dict(self.transitions.most_common()),
+            "examples": self.examples,
+        }
+
+# Built once per worker process by _init_worker
+_processor = None
+
+def _init_worker(options: Dict):
+    global _processor
+    # Stdout may be the decisions stream
+    sys.stdout = sys.stderr
+    _processor = build_processor(fuzzy_threshold=options["threshold"], config_path=options["config"])
+
+def _decide_chunk(items: List[Dict], execute: bool) -> List[Dict]:
+    return [decide(_processor, item, execute) for item in items]
+
+def run(args) -> Dict:
+    options = {"threshold": args.threshold, "config": args.config}
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    diff = DecisionDiff(args.diff) if args.diff else None
+    intents = Counter()
+    total = 0
+
+    def write(decisions: List[Dict]):
+        nonlocal total
+        for decision in decisions:
+            output.write(json.dumps(decision, ensure_ascii=False) + "\n")
+            intents[decision["intent"]] += 1
+            if diff:
+                diff.compare(decision)
+        total += len(decisions)
+
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(options,)) as pool:
+            # Bounded window of chunks in flight, written back in input order
+            pending = deque()
+            for chunk in chunked(read_transcripts(args.input), args.chunk_size):
+                pending.append(pool.submit(_decide_chunk, chunk, args.execute))
+                if len(pending) >= args.workers * 2:
+                    write(pending.popleft().result())
+            while pending:
+                write(pending.popleft().result())
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    elapsed = time.perf_counter() - start
+
+    report = {
+        "transcripts": total,
+        "seconds": round(elapsed, 3),
+        "throughput": round(total / elapsed, 1) if elapsed else 0.0,
+        "unresolved": intents.get(None, 0),
+        "intents": {str(intent): count for intent, count in intents.most_common()},
+    }
+    if diff:
+        report["diff"] = diff.report()
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Resolve logged transcripts in bulk")
+    parser.add_argument("input", help="JSONL transcripts, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="Decisions JSONL (default: stdout)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--chunk-size", type=int, default=500, help="Transcripts per task sent to a worker")
+    parser.add_argument("--threshold", type=float, default=FUZZY_THRESHOLD, help="Fuzzy matching threshold")
+    parser.add_argument("--config", default=COMMANDS_CONFIG, help="Command manifest to resolve against")
+    parser.add_argument("--execute", action="store_true", help="Also execute commands (may have side effects)")
+    parser.add_argument("--diff", help="Previous decisions JSONL from the same input to compare against")
+    parser.add_argument("--report", help="Write the summary JSON here instead of stderr")
+    args = parser.parse_args()
+
+    report = json.dumps(run(args), indent=2, ensure_ascii=False)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            f.write(report)
+    else:
+        print(report, file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
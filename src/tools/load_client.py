@@ -0,0 +1,104 @@
+"""
+Load generator for server.py.
+
+Opens --connections keep-alive connections, each acting as its own client,
+and pipelines up to --depth transcript requests at a time. Reports
+throughput and latency percentiles. Run from src/ while the server is up:
+
+    python -m tools.load_client --port 8765 --connections 16 --depth 4 --requests 5000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from utils.metrics import LatencyHistogram
+from tools.throughput_bench import SYNTHETIC_UTTERANCES
+
+async def read_response(reader: asyncio.StreamReader) -> int:
+    """Read one HTTP response and return its status code"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Server closed the connection")
+    status = int(status_line.split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value.strip())
+    await reader.readexactly(length)
+    return status
+
+async def run_client(index: int, host: str, port: int, requests: int, depth: int,
+                     histogram: LatencyHistogram, errors: list):
+    reader, writer = await asyncio.open_connection(host, port)
+    sent_at = []
+    sent = received = 0
+
+    def build_request(n: int) -> bytes:
+        body = json.dumps({
+            "text": SYNTHETIC_UTTERANCES[(n + index) % len(SYNTHETIC_UTTERANCES)],
+            "client_id": f"load-{index}",
+        }).encode("utf-8")
+        return (
+            "POST /transcript HTTP/1.1\r\n"
+            f"Host: {host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n"
+        ).encode("latin-1") + body
+
+    while received < requests:
+        # Keep up to `depth` requests in flight on this connection
+        while sent < requests and sent - received < depth:
+            writer.write(build_request(sent))
+            sent_at.append(time.perf_counter())
+            sent += 1
+        await writer.drain()
+
+        status = await read_response(reader)
+        histogram.record(time.perf_counter() - sent_at[received])
+        if status != 200:
+            errors.append(status)
+        received += 1
+
+    writer.close()
+
+async def run(args) -> dict:
+    histogram = LatencyHistogram()
+    errors = []
+    per_client = max(1, args.requests // args.connections)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        run_client(i, args.host, args.port, per_client, args.depth, histogram, errors)
+        for i in range(args.connections)
+    ))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "connections": args.connections,
+        "depth": args.depth,
+        "requests": histogram.count,
+        "errors": len(errors),
+        "seconds": round(elapsed, 3),
+        "throughput": round(histogram.count / elapsed, 1),
+        "p50_ms": round(histogram.percentile(50) * 1000, 2),
+        "p95_ms": round(histogram.percentile(95) * 1000, 2),
+        "p99_ms": round(histogram.percentile(99) * 1000, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for the assistant server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--depth", type=int, default=4, help="Pipelined requests per connection")
+    parser.add_argument("--requests", type=int, default=2000, help="Total requests")
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""
+Offline replay harness: runs recorded utterances through the whole pipeline
+(recorder -> transcriber -> processor -> TTS) without a microphone or the
+OpenAI API, and reports per-stage timings, intent accuracy and throughput.
+
+The corpus is a directory of WAV files plus a corpus.jsonl describing them:
+
+    {"audio": "hora.wav", "text": "Furina qué hora es", "intent": "TimeCommand", "language": "es"}
+
+"text" is the transcript the fixture transcriber returns for that file,
+"intent" the expected command name ("A+B" for compound utterances, null
+when nothing should match) and "language" is optional. Run from src/:
+
+    python -m tools.replay corpus/ --workers 4 --min-accuracy 0.95 --max-p95-ms 50
+
+By default commands are only resolved, never executed; --execute also runs
+them and speaks the responses into a silent TTS sink; --dsp conditions the
+recordings like the live assistant's AUDIO_DSP option. Exits with status 1
+when a --min-accuracy or --max-p95-ms gate fails.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.util import Finalize
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+
+from assistant import build_processor
+from audio.recorder import AudioRecorder
+from audio.tts import TextToSpeech, TTSEngine
+from tools.batch import intent_of
+from utils.metrics import LatencyHistogram
+
+STAGES = ["record", "transcribe", "resolve", "execute", "speak", "total"]
+
+class FilePlayback:
+    """Stand-in for the sounddevice module whose rec() plays back a WAV file"""
+
+    def __init__(self, realtime=False):
+        # Sleep for the clip length in wait(), like a live recording would
+        self.realtime = realtime
+        self.source = None
+        self._seconds = 0.0
+
+    def rec(self, frames, samplerate, channels=1, dtype='int16'):
+        audio, file_samplerate = sf.read(self.source, dtype=dtype, always_2d=True)
+        if file_samplerate != samplerate:
+            print(f"⚠️  {self.source}: {file_samplerate} Hz, expected {samplerate} Hz")
+        audio = audio[:frames, :channels]
+        if len(audio) < frames:
+            # A live recording keeps going after the speaker stops: pad with silence
+            audio = np.concatenate([audio, np.zeros((frames - len(audio), audio.shape[1]), dtype=audio.dtype)])
+        self._seconds = frames / samplerate
+        return audio
+
+    def wait(self):
+        if self.realtime:
+            time.sleep(self._seconds)
+
+class ReplayRecorder(AudioRecorder):
+    """AudioRecorder whose input device plays back WAV files"""
+
+    def __init__(self, samplerate=16000, realtime=False):
+        super().__init__(samplerate=samplerate)
+        self.sounddevice = FilePlayback(realtime)
+        # Recordings are written here under the clip's corpus path, one directory per worker
+        self.output_dir = tempfile.mkdtemp(prefix="replay-")
+
+    def load(self, path: str, name: Optional[str] = None):
+        """
+        Set the file the next record_audio call plays back, recording for its whole length
+        name: relative path of the recording under output_dir (defaults to the file name)
+        """
+        self.sounddevice.source = path
+        self.duration = sf.info(path).frames / self.samplerate
+        self.filename = os.path.join(self.output_dir, os.path.normpath(name or os.path.basename(path)))
+        os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+
+    def close(self):
+        """Remove the recordings directory"""
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+
+class FixtureTranscriber:
+    """Stand-in for AudioTranscriber returning known transcripts by corpus path"""
+
+    def __init__(self, fixtures: Dict[str, Tuple[str, Optional[str]]], latency: float = 0.0, root: str = ""):
+        self.fixtures = {os.path.normpath(audio): fixture for audio, fixture in fixtures.items()}
+        # Simulated API round trip in seconds
+        self.latency = latency
+        # Directory the transcribed files' corpus paths are relative to
+        self.root = root
+
+    def transcribe_audio(self, filename):
+        return self.transcribe_with_language(filename)[0]
+
+    def transcribe_with_language(self, filename):
+        if self.latency:
+            time.sleep(self.latency)
+        text, language = self.fixtures.get(os.path.relpath(filename, self.root or None), (None, None))
+        return text, language, 1.0 if text else 0.0
+
+class NullTTS(TTSEngine):
+    """Silent TTS engine that only counts what it was asked to say"""
+
+    def __init__(self):
+        self.spoken = 0
+        self.characters = 0
+
+    def speak(self, text: str) -> bool:
+        self.spoken += 1
+        self.characters += len(text)
+        return True
+
+    def is_available(self) -> bool:
+        return True
+
+def load_corpus(directory: str) -> List[Dict]:
+    """Read corpus.jsonl, skipping entries whose audio file is missing"""
+    entries = []
+    with open(os.path.join(directory, "corpus.jsonl"), "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if not os.path.exists(os.path.join(directory, entry["audio"])):
+                print(f"⚠️  corpus.jsonl:{line_number}: {entry['audio']} not found, skipped", file=sys.stderr)
+                continue
+            entries.append(entry)
+    return entries
+
+# One pipeline per worker process, built once by _init_worker
+_pipeline = {}
+
+def _init_worker(directory: str, fixtures: Dict, options: Dict):
+    # Keep stdout for the JSON report
+    sys.stdout = sys.stderr
+    _pipeline["directory"] = directory
+    _pipeline["recorder"] = ReplayRecorder(realtime=options["realtime"])
+    # Worker processes skip atexit; multiprocessing runs its finalizers on exit
+    Finalize(_pipeline["recorder"], _pipeline["recorder"].close, exitpriority=10)
+    if options["dsp"]:
+        from audio.dsp import AudioConditioner
+        _pipeline["recorder"].set_dsp(AudioConditioner())
+    _pipeline["transcriber"] = FixtureTranscriber(fixtures, latency=options["transcribe_latency"],
+                                                  root=_pipeline["recorder"].output_dir)
+    _pipeline["tts"] = TextToSpeech(engines=[NullTTS()])
+    _pipeline["processor"] = build_processor(_pipeline["tts"])
+    _pipeline["execute"] = options["execute"]
+
+def _replay_one(entry: Dict) -> Dict:
+    recorder = _pipeline["recorder"]
+    transcriber = _pipeline["transcriber"]
+    processor = _pipeline["processor"]
+    timings = {}
+
+    started = time.perf_counter()
+    recorder.load(os.path.join(_pipeline["directory"], entry["audio"]), entry["audio"])
+    filename = recorder.record_audio()
+    timings["record"] = time.perf_counter() - started
+
+    stage_start = time.perf_counter()
+    text, language, confidence = transcriber.transcribe_with_language(filename)
+    timings["transcribe"] = time.perf_counter() - stage_start
+    os.remove(filename)
+
+    intent = None
+    if text:
+        stage_start = time.perf_counter()
+        intent = intent_of(processor.resolve_text(text, language, confidence))
+        timings["resolve"] = time.perf_counter() - stage_start
+
+        if _pipeline["execute"]:
+            stage_start = time.perf_counter()
+            response = processor.process_text(text, language=language, language_confidence=confidence,
+                                              snr_db=recorder.last_snr_db)
+            timings["execute"] = time.perf_counter() - stage_start
+
+            stage_start = time.perf_counter()
+            _pipeline["tts"].speak(response)
+            timings["speak"] = time.perf_counter() - stage_start
+
+    timings["total"] = time.perf_counter() - started
+    return {
+        "audio": entry["audio"],
+        "text": text,
+        "labelled": "intent" in entry,
+        "expected": entry.get("intent"),
+        "intent": intent,
+        "timings": timings,
+    }
+
+def run(directory: str, entries: List[Dict], workers: int, options: Dict) -> Dict:
+    fixtures = {entry["audio"]: (entry.get("text"), entry.get("language")) for entry in entries}
+    histograms = {stage: LatencyHistogram() for stage in STAGES}
+    correct = labelled = 0
+    failures = []
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(directory, fixtures, options)) as pool:
+        for result in pool.map(_replay_one, entries, chunksize=max(1, len(entries) // (workers * 4))):
+            for stage, seconds in result["timings"].items():
+                histograms[stage].record(seconds)
+            if result["labelled"]:
+                labelled += 1
+                if result["intent"] == result["expected"]:
+                    correct += 1
+                else:
+                    failures.append({key: result[key] for key in ("audio", "text", "expected", "intent")})
+    elapsed = time.perf_counter() - start
+
+    return {
+        "utterances": len(entries),
+        "workers": workers,
+        "mode": "execute" if options["execute"] else "resolve",
+        "seconds": round(elapsed, 3),
+        "throughput": round(len(entries) / elapsed, 1) if elapsed else 0.0,
+        "accuracy": round(correct / labelled, 4) if labelled else None,
+        "stages": {
+            stage: {
+                "count": histogram.count,
+                "mean_ms": round(histogram.mean() * 1000, 3),
+                "p50_ms": round(histogram.percentile(50) * 1000, 3),
+                "p95_ms": round(histogram.percentile(95) * 1000, 3),
+                "p99_ms": round(histogram.percentile(99) * 1000, 3),
+            }
+            for stage, histogram in histograms.items() if histogram.count
+        },
+        "failures": failures[:50],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded corpus through the assistant pipeline")
+    parser.add_argument("corpus", help="Directory with WAV files and corpus.jsonl")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--execute", action="store_true", help="Also execute commands (may have side effects)")
+    parser.add_argument("--realtime", action="store_true", help="Play back audio at recording speed")
+    parser.add_argument("--dsp", action="store_true", help="Run recordings through noise suppression and AGC")
+    parser.add_argument("--transcribe-latency", type=float, default=0.0, help="Simulated transcription seconds")
+    parser.add_argument("--min-accuracy", type=float, help="Fail if intent accuracy is below this (0-1)")
+    parser.add_argument("--max-p95-ms", type=float, help="Fail if end-to-end p95 latency exceeds this")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    entries = load_corpus(args.corpus)
+    if not entries:
+        print("No utterances to replay", file=sys.stderr)
+        sys.exit(1)
+
+    options = {"execute": args.execute, "realtime": args.realtime, "dsp": args.dsp,
+               "transcribe_latency": args.transcribe_latency}
+    report = run(args.corpus, entries, args.workers, options)
+
+    gates = []
+    if args.min_accuracy is not None and (report["accuracy"] or 0.0) < args.min_accuracy:
+        gates.append(f"accuracy {report['accuracy']} < {args.min_accuracy}")
+    if args.max_p95_ms is not None and report["stages"]["total"]["p95_ms"] > args.max_p95_ms:
+        gates.append(f"p95 {report['stages']['total']['p95_ms']} ms > {args.max_p95_ms} ms")
+    report["gates_failed"] = gates
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    if gates:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
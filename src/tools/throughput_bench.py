@@ -0,0 +1,92 @@
+"""
+Multi-threaded throughput benchmark for CommandProcessor.process_text.
+
+Drives N threads (one Session each, like N microphones) with synthetic
+utterances against one shared processor and reports utterances/second and
+scaling relative to a single thread. Run from src/:
+
+    python -m tools.throughput_bench --threads 1 2 4 8 --utterances 2000
+"""
+import argparse
+import json
+import threading
+import time
+
+from assistant import build_processor
+from commands.session import Session
+
+# Side-effect-free utterances: exact hits, fuzzy hits, compound and failures
+SYNTHETIC_UTTERANCES = [
+    "Furina qué hora es",
+    "Furina fecha de hoy",
+    "Furina hola",
+    "Furina que ora es",
+    "Furina ayua",
+    "Furina qué hora es y la fecha de hoy",
+    "Furina repite",
+    "Furina test fuzzy",
+    "Furina xyzzy plugh",
+    "hola sin activación",
+]
+
+def run_threads(processor, thread_count: int, utterances_per_thread: int) -> float:
+    """Returns elapsed seconds for all threads to finish"""
+    barrier = threading.Barrier(thread_count + 1)
+
+    def worker(index: int):
+        session = Session(f"bench-{index}")
+        barrier.wait()
+        for i in range(utterances_per_thread):
+            processor.process_text(SYNTHETIC_UTTERANCES[(i + index) % len(SYNTHETIC_UTTERANCES)], session)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(thread_count)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="CommandProcessor multi-threaded throughput benchmark")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--utterances", type=int, default=1000, help="Utterances per thread")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    processor = build_processor()
+    # Warm up caches and the worker pool
+    run_threads(processor, 1, len(SYNTHETIC_UTTERANCES))
+
+    results = []
+    baseline = None
+    for thread_count in args.threads:
+        processor.reset_stats()
+        elapsed = run_threads(processor, thread_count, args.utterances)
+        total = thread_count * args.utterances
+        throughput = total / elapsed
+        baseline = baseline or throughput
+        stats = processor.get_stats()
+        results.append({
+            "threads": thread_count,
+            "utterances": total,
+            "seconds": round(elapsed, 4),
+            "throughput": round(throughput, 1),
+            "scaling": round(throughput / baseline, 2),
+            # Compound utterances count once per segment, so this is >= utterances
+            "counted": stats["total_commands"],
+        })
+
+    processor.shutdown()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'threads':>7} {'utterances':>10} {'seconds':>8} {'utt/s':>9} {'scaling':>7}")
+    for r in results:
+        print(f"{r['threads']:>7} {r['utterances']:>10} {r['seconds']:>8.3f} {r['throughput']:>9.1f} {r['scaling']:>6.2f}x")
+
+if __name__ == "__main__":
+    main()
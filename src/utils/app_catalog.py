@@ -0,0 +1,275 @@
+import json
+import os
+import re
+import shlex
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+def normalize_name(name: str) -> str:
+    """Lowercase, strip accents and punctuation from an application name"""
+    name = unicodedata.normalize("NFKD", name.lower())
+    name = "".join(c for c in name if not unicodedata.combining(c))
+    name = re.sub(r'[^a-z0-9]+', ' ', name)
+    return name.strip()
+
+def phonetic_key(name: str) -> str:
+    """Rough Spanish/English sound-alike key so 'fairfox' finds 'firefox'"""
+    key = normalize_name(name).replace(" ", "")
+    # Order matters: digraphs first, then single letters
+    for src, dst in (("ph", "f"), ("qu", "k"), ("ll", "y"),
+                     ("ce", "se"), ("ci", "si"), ("ge", "je"), ("gi", "ji")):
+        key = key.replace(src, dst)
+    key = key.translate(str.maketrans("vzcqw", "bskku", "h"))
+    # Vowels after the first letter carry little signal in misheard names
+    key = key[:1] + re.sub(r'[aeiouy]', '', key[1:])
+    # Collapse repeated letters
+    return re.sub(r'(.)\1+', r'\1', key)
+
+def _default_index_path() -> str:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "furina_assistant", "apps.json")
+
+def _default_desktop_dirs() -> List[str]:
+    data_home = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    data_dirs = os.environ.get("XDG_DATA_DIRS") or "/usr/local/share:/usr/share"
+    dirs = [data_home] + [d for d in data_dirs.split(":") if d]
+    return [os.path.join(d, "applications") for d in dirs]
+
+def _default_path_dirs() -> List[str]:
+    return [d for d in os.environ.get("PATH", "").split(os.pathsep) if d]
+
+class AppCatalog:
+    """
+    Catalog of installed applications built from XDG .desktop files and $PATH.
+
+    The scan result is persisted as a JSON index keyed by directory. On load,
+    only directories whose mtime changed since the last scan are rescanned.
+    Lookups go through in-memory dicts keyed by normalized and phonetic names.
+    Only .desktop applications are matched loosely; a $PATH binary must be
+    named exactly, so a misheard word can't start "renice" or "sed".
+    """
+
+    INDEX_VERSION = 1
+    # Leading words ignored when naming a $PATH binary ("abre el htop")
+    ARTICLES = ("el", "la", "los", "las", "un", "una", "the", "a", "an")
+
+    def __init__(self, index_path: Optional[str] = None,
+                 desktop_dirs: Optional[List[str]] = None,
+                 path_dirs: Optional[List[str]] = None):
+        self.index_path = index_path or _default_index_path()
+        self.desktop_dirs = desktop_dirs if desktop_dirs is not None else _default_desktop_dirs()
+        self.path_dirs = path_dirs if path_dirs is not None else _default_path_dirs()
+        # dir -> {"mtime": float, "kind": "desktop"|"path", "entries": [[name, exec], ...]}
+        self.dirs: Dict[str, Dict] = {}
+        # .desktop applications, by normalized and phonetic name
+        self.by_name: Dict[str, str] = {}
+        self.by_phonetic: Dict[str, str] = {}
+        # $PATH binaries, by normalized name (exact matches only)
+        self.by_binary: Dict[str, str] = {}
+        self.loaded = False
+
+    def load(self) -> int:
+        """Loads the persisted index and refreshes changed directories. Returns entry count."""
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == self.INDEX_VERSION:
+                self.dirs = data.get("dirs", {})
+        except (OSError, ValueError):
+            self.dirs = {}
+
+        changed = self.refresh()
+        if changed:
+            self.save()
+        else:
+            self._build_lookup()
+        self.loaded = True
+        return len(self)
+
+    def refresh(self) -> bool:
+        """Rescans only directories that were added, removed or modified. Returns True if anything changed."""
+        wanted = [(d, "desktop") for d in self.desktop_dirs] + [(d, "path") for d in self.path_dirs]
+        wanted_dirs = {d for d, _ in wanted}
+        changed = False
+
+        for directory in list(self.dirs):
+            if directory not in wanted_dirs:
+                del self.dirs[directory]
+                changed = True
+
+        for directory, kind in wanted:
+            try:
+                mtime = os.stat(directory).st_mtime
+            except OSError:
+                if directory in self.dirs:
+                    del self.dirs[directory]
+                    changed = True
+                continue
+
+            cached = self.dirs.get(directory)
+            if cached and cached.get("mtime") == mtime and cached.get("kind") == kind:
+                continue
+
+            if kind == "desktop":
+                entries = self._scan_desktop_dir(directory)
+            else:
+                entries = self._scan_path_dir(directory)
+            self.dirs[directory] = {"mtime": mtime, "kind": kind, "entries": entries}
+            changed = True
+
+        if changed:
+            self._build_lookup()
+        return changed
+
+    def save(self):
+        """Atomically writes the index to disk"""
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            tmp_path = self.index_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": self.INDEX_VERSION, "dirs": self.dirs}, f, separators=(",", ":"))
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            print(f"Could not save application index: {e}")
+
+    def lookup(self, text: str) -> Optional[Tuple[str, str]]:
+        """
+        Finds the application mentioned in text.
+        Tries the longest word n-grams first, by normalized name then phonetic key,
+        for .desktop applications; a $PATH binary only when text is exactly its name.
+        Returns: (matched_name, command) or None
+        """
+        if not self.loaded:
+            self.load()
+
+        words = normalize_name(text).split()
+        for size in range(len(words), 0, -1):
+            for start in range(len(words) - size + 1):
+                candidate = " ".join(words[start:start + size])
+                command = self.by_name.get(candidate)
+                if command:
+                    return candidate, command
+
+        name_words = words[1:] if words[:1] and words[0] in self.ARTICLES else words
+        name = " ".join(name_words)
+        command = self.by_binary.get(name)
+        if command:
+            return name, command
+
+        for size in range(len(words), 0, -1):
+            for start in range(len(words) - size + 1):
+                candidate = " ".join(words[start:start + size])
+                key = phonetic_key(candidate)
+                # Very short keys collide too easily
+                if len(key) < 3:
+                    continue
+                command = self.by_phonetic.get(key)
+                if command:
+                    return candidate, command
+
+        return None
+
+    def __len__(self) -> int:
+        return len(self.by_name) + len(self.by_binary)
+
+    def _build_lookup(self):
+        """Rebuilds the in-memory lookup tables. Desktop entries win over $PATH binaries."""
+        by_name: Dict[str, str] = {}
+        by_phonetic: Dict[str, str] = {}
+        by_binary: Dict[str, str] = {}
+
+        for directory in (d for d in self.desktop_dirs if d in self.dirs):
+            for name, command in self.dirs[directory]["entries"]:
+                key = normalize_name(name)
+                if key and key not in by_name:
+                    by_name[key] = command
+                pkey = phonetic_key(name)
+                if pkey and pkey not in by_phonetic:
+                    by_phonetic[pkey] = command
+
+        for directory in (d for d in self.path_dirs if d in self.dirs):
+            for name, command in self.dirs[directory]["entries"]:
+                key = normalize_name(name)
+                if key and key not in by_name and key not in by_binary:
+                    by_binary[key] = command
+
+        self.by_name = by_name
+        self.by_phonetic = by_phonetic
+        self.by_binary = by_binary
+
+    @staticmethod
+    def _scan_desktop_dir(directory: str) -> List[List[str]]:
+        """Parses every .desktop file in a directory"""
+        entries = []
+        try:
+            files = [e.path for e in os.scandir(directory) if e.name.endswith(".desktop") and e.is_file()]
+        except OSError:
+            return entries
+
+        for path in sorted(files):
+            entry = AppCatalog._parse_desktop_file(path)
+            if not entry:
+                continue
+            names, command = entry
+            for name in names:
+                entries.append([name, command])
+        return entries
+
+    @staticmethod
+    def _parse_desktop_file(path: str) -> Optional[Tuple[List[str], str]]:
+        """Reads Name/GenericName/Exec from the [Desktop Entry] group"""
+        fields = {}
+        in_entry = False
+        try:
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                for line in f:
+                    line = line.strip()
+                    if line.startswith("["):
+                        in_entry = line == "[Desktop Entry]"
+                        continue
+                    if not in_entry or "=" not in line or line.startswith("#"):
+                        continue
+                    key, value = line.split("=", 1)
+                    fields.setdefault(key.strip(), value.strip())
+        except OSError:
+            return None
+
+        if fields.get("Type", "Application") != "Application":
+            return None
+        if fields.get("NoDisplay") == "true" or fields.get("Hidden") == "true":
+            return None
+
+        exec_line = fields.get("Exec")
+        if not exec_line:
+            return None
+        # Drop field codes like %U, %f
+        try:
+            args = [a for a in shlex.split(exec_line) if not (len(a) == 2 and a.startswith("%"))]
+        except ValueError:
+            return None
+        if not args:
+            return None
+        command = " ".join(shlex.quote(a) for a in args)
+
+        names = []
+        for key in ("Name[es]", "Name", "GenericName[es]", "GenericName"):
+            if fields.get(key) and fields[key] not in names:
+                names.append(fields[key])
+        names.append(os.path.basename(path)[:-len(".desktop")])
+        return names, command
+
+    @staticmethod
+    def _scan_path_dir(directory: str) -> List[List[str]]:
+        """Lists executables in a $PATH directory"""
+        entries = []
+        try:
+            for entry in os.scandir(directory):
+                try:
+                    if entry.is_file() and os.access(entry.path, os.X_OK):
+                        entries.append([entry.name, entry.name])
+                except OSError:
+                    continue
+        except OSError:
+            pass
+        entries.sort()
+        return entries
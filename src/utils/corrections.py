@@ -0,0 +1,225 @@
+import json
+import os
+import threading
+import time
+from typing import Container, Dict, Iterable, List, Optional, Tuple
+
+from utils.fuzzy_matcher import FuzzyMatcher
+
+class CorrectionTable:
+    """
+    Learned token rewrites for recurring misrecognitions ("ayua" -> "ayuda").
+
+    Every confident fuzzy match teaches the table which raw token stood for
+    which keyword word. Weights decay with a half-life so stale corrections
+    fade out; once a token's weight reaches min_count it is rewritten with a
+    single dict lookup before matching, turning the next fuzzy match into an
+    exact one.
+    """
+
+    def __init__(self, path: Optional[str] = None, min_confidence: float = 75.0,
+                 min_similarity: float = 70.0, min_count: float = 1.5,
+                 half_life_days: float = 30.0, autosave_every: int = 10):
+        self.path = path
+        self.min_confidence = min_confidence
+        self.min_similarity = min_similarity
+        # Decayed weight needed to rewrite; 1.5 means about two recent sightings
+        self.min_count = min_count
+        self.half_life = half_life_days * 86400
+        self.autosave_every = autosave_every
+        # token -> {replacement: [weight, last_seen]}
+        self.entries: Dict[str, Dict[str, List[float]]] = {}
+        # token -> replacement, only for corrections above min_count
+        self.rewrites: Dict[str, str] = {}
+        self.lock = threading.Lock()
+        self._unsaved = 0
+
+        if path:
+            self.load()
+
+    def rewrite(self, text: str) -> Tuple[str, int]:
+        """Replace known misrecognized tokens. Returns (text, number of tokens rewritten)"""
+        rewrites = self.rewrites
+        if not rewrites:
+            return text, 0
+
+        words = text.split()
+        changed = 0
+        for i, word in enumerate(words):
+            replacement = rewrites.get(word)
+            if replacement:
+                words[i] = replacement
+                changed += 1
+        return (" ".join(words), changed) if changed else (text, 0)
+
+    def learn(self, text: str, keyword: str, known_words: Container[str]) -> List[Tuple[str, str]]:
+        """
+        Record which tokens of text stood for the words of the matched keyword.
+        Tokens that are already valid keyword words are never learned.
+        Returns the (token, replacement) pairs that were recorded.
+        """
+        learned = []
+        tokens = [t for t in FuzzyMatcher._clean_string(text).split() if len(t) >= 3 and t not in known_words]
+        if not tokens:
+            return learned
+
+        for keyword_word in FuzzyMatcher._clean_string(keyword).split():
+            best_token, best_score = None, 0.0
+            for token in tokens:
+                score = FuzzyMatcher.similarity_ratio(token, keyword_word)
+                if score > best_score:
+                    best_token, best_score = token, score
+            if best_token and self.min_similarity <= best_score < 100.0:
+                self._record(best_token, keyword_word)
+                learned.append((best_token, keyword_word))
+
+        if learned and self.path and self._unsaved >= self.autosave_every:
+            self.save()
+        return learned
+
+    def _record(self, token: str, replacement: str, now: Optional[float] = None):
+        now = now or time.time()
+        with self.lock:
+            candidates = self.entries.setdefault(token, {})
+            weight, last_seen = candidates.get(replacement, [0.0, now])
+            candidates[replacement] = [self._decay(weight, last_seen, now) + 1.0, now]
+            self._unsaved += 1
+            self._refresh_token(token, now)
+
+    def _decay(self, weight: float, last_seen: float, now: float) -> float:
+        if not self.half_life:
+            return weight
+        return weight * 0.5 ** (max(0.0, now - last_seen) / self.half_life)
+
+    def _active_replacement(self, token: str, now: float) -> Optional[str]:
+        best, best_weight = None, 0.0
+        for replacement, (weight, last_seen) in self.entries.get(token, {}).items():
+            current = self._decay(weight, last_seen, now)
+            if current > best_weight:
+                best, best_weight = replacement, current
+        return best if best_weight >= self.min_count else None
+
+    def _refresh_token(self, token: str, now: float):
+        """Recompute the active rewrite for one token (caller holds the lock)"""
+        best = self._active_replacement(token, now)
+        if self.rewrites.get(token) == best:
+            return
+        # Copy-on-write so rewrite() can read without taking the lock
+        rewrites = dict(self.rewrites)
+        if best:
+            rewrites[token] = best
+        else:
+            rewrites.pop(token, None)
+        self.rewrites = rewrites
+
+    def _rebuild_rewrites(self, now: float):
+        """Recompute every active rewrite (caller holds the lock)"""
+        rewrites = {}
+        for token in self.entries:
+            best = self._active_replacement(token, now)
+            if best:
+                rewrites[token] = best
+        self.rewrites = rewrites
+
+    def forget(self, tokens: Iterable[str] = (), replacements: Iterable[str] = ()) -> int:
+        """Drop corrections for the given tokens or pointing at the given words. Returns entries removed."""
+        tokens, replacements = set(tokens), set(replacements)
+        removed = 0
+        now = time.time()
+        with self.lock:
+            for token in list(self.entries):
+                candidates = self.entries[token]
+                if token in tokens:
+                    removed += len(candidates)
+                    del self.entries[token]
+                else:
+                    for replacement in [r for r in candidates if r in replacements]:
+                        del candidates[replacement]
+                        removed += 1
+                    if not candidates:
+                        del self.entries[token]
+            self._rebuild_rewrites(now)
+            self._unsaved += removed
+        return removed
+
+    def prune(self, min_weight: float = 0.25) -> int:
+        """Remove corrections whose decayed weight fell below min_weight. Returns entries removed."""
+        now = time.time()
+        removed = 0
+        with self.lock:
+            for token in list(self.entries):
+                candidates = self.entries[token]
+                for replacement in list(candidates):
+                    weight, last_seen = candidates[replacement]
+                    if self._decay(weight, last_seen, now) < min_weight:
+                        del candidates[replacement]
+                        removed += 1
+                if not candidates:
+                    del self.entries[token]
+            self._rebuild_rewrites(now)
+            self._unsaved += removed
+        return removed
+
+    def items(self) -> List[Tuple[str, str, float, bool]]:
+        """(token, replacement, decayed weight, active) sorted by weight, for inspection"""
+        now = time.time()
+        with self.lock:
+            rows = [
+                (token, replacement, self._decay(weight, last_seen, now), self.rewrites.get(token) == replacement)
+                for token, candidates in self.entries.items()
+                for replacement, (weight, last_seen) in candidates.items()
+            ]
+        rows.sort(key=lambda row: row[2], reverse=True)
+        return rows
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f).get("entries", {})
+        except (OSError, ValueError):
+            self.entries = {}
+        now = time.time()
+        with self.lock:
+            self._rebuild_rewrites(now)
+
+    def save(self):
+        """Atomically write the table to disk"""
+        if not self.path:
+            return
+        with self.lock:
+            data = json.dumps({"entries": self.entries}, ensure_ascii=False)
+            self._unsaved = 0
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Could not save corrections: {e}")
+
+def main():
+    """Inspect or prune a saved correction table: python -m utils.corrections corrections.json"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect or prune learned corrections")
+    parser.add_argument("path")
+    parser.add_argument("--prune", type=float, metavar="MIN_WEIGHT", help="Remove entries below this weight")
+    parser.add_argument("--forget", nargs="+", metavar="TOKEN", help="Remove these tokens")
+    args = parser.parse_args()
+
+    table = CorrectionTable(args.path)
+    if args.forget:
+        print(f"Removed {table.forget(tokens=args.forget)} entries")
+    if args.prune is not None:
+        print(f"Removed {table.prune(args.prune)} entries")
+    if args.forget or args.prune is not None:
+        table.save()
+
+    for token, replacement, weight, active in table.items():
+        print(f"{'*' if active else ' '} {token:<20} -> {replacement:<20} {weight:6.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import threading
+from typing import Dict, Iterable
+
+class ThreadLocalCounters:
+    """
+    Named counters that are safe to increment from many threads without a lock.
+
+    Each thread increments its own dict (only that thread ever writes to it),
+    and reads merge all per-thread dicts. The lock is only taken when a new
+    thread registers its dict, on reads and on reset.
+    """
+
+    def __init__(self, keys: Iterable[str]):
+        self.keys = list(keys)
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+
+    def _shard(self) -> Dict[str, int]:
+        shard = getattr(self._local, "counts", None)
+        if shard is None:
+            shard = dict.fromkeys(self.keys, 0)
+            with self._lock:
+                self._shards.append(shard)
+            self._local.counts = shard
+        return shard
+
+    def increment(self, key: str, amount: int = 1):
+        self._shard()[key] += amount
+
+    def snapshot(self) -> Dict[str, int]:
+        """Merged totals across all threads"""
+        totals = dict.fromkeys(self.keys, 0)
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            for key in self.keys:
+                totals[key] += shard[key]
+        return totals
+
+    def __getitem__(self, key: str) -> int:
+        return self.snapshot()[key]
+
+    def reset(self):
+        """Zero all counters (increments racing with the reset may survive it)"""
+        with self._lock:
+            for shard in self._shards:
+                for key in self.keys:
+                    shard[key] = 0
@@ -1,4 +1,4 @@
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 import re
 
 class FuzzyMatcher:
@@ -74,10 +74,15 @@ class FuzzyMatcher:
         return (best_match, best_score) if best_match else None
     
     @staticmethod
-    def partial_match(text: str, target: str, threshold: float = 70.0) -> bool:
-        """Check if text partially matches target"""
+    def partial_match(text: str, target: str, threshold: float = 70.0, target_clean: Optional[str] = None) -> bool:
+        """Check if text partially matches target (target_clean: pre-cleaned target, if cached)"""
         text_clean = FuzzyMatcher._clean_string(text)
-        target_clean = FuzzyMatcher._clean_string(target)
+        if target_clean is None:
+            target_clean = FuzzyMatcher._clean_string(target)
+        
+        # Nothing left after removing stop words ("" is a substring of everything)
+        if not text_clean or not target_clean:
+            return False
         
         # Direct substring match
         if target_clean in text_clean or text_clean in target_clean:
@@ -88,13 +93,16 @@ class FuzzyMatcher:
         return score >= threshold
     
     @staticmethod
-    def extract_keywords(text: str, keyword_list: List[str], threshold: float = 60.0) -> List[Tuple[str, float]]:
-        """Extract keywords from text that match the keyword list"""
+    def extract_keywords(text: str, keyword_list: List[str], threshold: float = 60.0,
+                         cleaned: Optional[Dict[str, str]] = None) -> List[Tuple[str, float]]:
+        """Extract keywords from text that match the keyword list (cleaned: cache of cleaned keywords)"""
         matches = []
         text_words = FuzzyMatcher._clean_string(text).split()
         
         for keyword in keyword_list:
-            keyword_clean = FuzzyMatcher._clean_string(keyword)
+            keyword_clean = cleaned.get(keyword) if cleaned else None
+            if keyword_clean is None:
+                keyword_clean = FuzzyMatcher._clean_string(keyword)
             keyword_words = keyword_clean.split()
             
             # Check for exact word matches first
@@ -116,34 +124,57 @@ class FuzzyMatcher:
         # Sort by score descending
         matches.sort(key=lambda x: x[1], reverse=True)
         return matches
+    
+    @staticmethod
+    def keyword_coverage(text: str, keyword: str, threshold: float = 60.0) -> float:
+        """Fraction (0-1) of the keyword's words that appear in text, allowing fuzzy spellings"""
+        text_words = FuzzyMatcher._clean_string(text).split()
+        keyword_words = FuzzyMatcher._clean_string(keyword).split()
+        if not text_words or not keyword_words:
+            return 0.0
+        covered = sum(
+            1 for keyword_word in keyword_words
+            if any(FuzzyMatcher.similarity_ratio(text_word, keyword_word) >= threshold for text_word in text_words)
+        )
+        return covered / len(keyword_words)
 
 class SmartCommandMatcher:
     """Enhanced command matching with fuzzy logic"""
     
-    def __init__(self, threshold: float = 60.0):
+    def __init__(self, threshold: float = 60.0, keyword_index=None):
         self.threshold = threshold
         self.fuzzy = FuzzyMatcher()
+        # Optional utils.keyword_index.KeywordIndex with pre-cleaned keywords
+        self.keyword_index = keyword_index
     
-    def find_command_match(self, text: str, commands: List[object]) -> Optional[Tuple[object, float, str]]:
+    def find_command_match(self, text: str, commands: List[object],
+                           shard: Optional[List[Tuple[object, List[str]]]] = None) -> Optional[Tuple[object, float, str]]:
         """
         Find the best matching command for the given text
+        shard: (command, keywords) candidates to search instead of every command keyword
         Returns: (command_object, confidence_score, matched_keyword)
         """
         best_command = None
         best_score = 0.0
         best_keyword = ""
+        # Cleaning is idempotent, so clean the text once up front
+        text = self.fuzzy._clean_string(text)
+        if not text:
+            return None
+        cleaned = self.keyword_index.cleaned if self.keyword_index else None
         
-        for command in commands:
-            if not hasattr(command, 'keywords'):
-                continue
-            
+        if shard is None:
+            shard = [(command, command.keywords) for command in commands if hasattr(command, 'keywords')]
+        
+        for command, keywords in shard:
             # Try exact matches first
-            for keyword in command.keywords:
-                if self.fuzzy.partial_match(text, keyword, threshold=90.0):
+            for keyword in keywords:
+                target_clean = cleaned.get(keyword) if cleaned else None
+                if self.fuzzy.partial_match(text, keyword, threshold=90.0, target_clean=target_clean):
                     return (command, 100.0, keyword)
             
             # Try fuzzy matches
-            keyword_matches = self.fuzzy.extract_keywords(text, command.keywords, self.threshold)
+            keyword_matches = self.fuzzy.extract_keywords(text, keywords, self.threshold, cleaned)
             
             if keyword_matches:
                 top_match = keyword_matches[0]
@@ -154,13 +185,19 @@ class SmartCommandMatcher:
         
         return (best_command, best_score, best_keyword) if best_command else None
     
-    def suggest_corrections(self, text: str, commands: List[object], max_suggestions: int = 3) -> List[str]:
+    def suggest_corrections(self, text: str, commands: List[object], max_suggestions: int = 3,
+                            shard: Optional[List[Tuple[object, List[str]]]] = None) -> List[str]:
         """Suggest command corrections based on fuzzy matching"""
         all_keywords = []
-        for command in commands:
-            if hasattr(command, 'keywords'):
-                all_keywords.extend(command.keywords)
-        
-        matches = self.fuzzy.extract_keywords(text, all_keywords, threshold=30.0)
+        if shard is not None:
+            for _, keywords in shard:
+                all_keywords.extend(keywords)
+        else:
+            for command in commands:
+                if hasattr(command, 'keywords'):
+                    all_keywords.extend(command.keywords)
+        
+        cleaned = self.keyword_index.cleaned if self.keyword_index else None
+        matches = self.fuzzy.extract_keywords(text, all_keywords, threshold=30.0, cleaned=cleaned)
         suggestions = [match[0] for match in matches[:max_suggestions]]
         return suggestions
\ No newline at end of file
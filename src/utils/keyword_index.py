@@ -0,0 +1,140 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from utils.fuzzy_matcher import FuzzyMatcher
+
+class KeywordIndex:
+    """
+    Derived keyword structures, kept up to date one keyword at a time.
+
+    - owners: keyword -> commands that declare it
+    - cleaned: keyword -> normalized form used by fuzzy matching
+    - word_counts: keyword word -> number of (command, keyword) entries using it
+    - shards: language -> keyword -> commands; untagged keywords live under
+      None and belong to every language
+
+    add() and remove() touch only the entries for that keyword, so a keyword
+    reload never rebuilds the whole index.
+    """
+
+    def __init__(self):
+        self.owners: Dict[str, List[object]] = {}
+        self.cleaned: Dict[str, str] = {}
+        self.word_counts: Dict[str, int] = {}
+        self.shards: Dict[Optional[str], Dict[str, List[object]]] = {}
+        # Registration order, so shards list commands in the same priority as the processor
+        self.order: Dict[object, int] = {}
+        # language -> [(command, keywords)], rebuilt lazily after a change
+        self._shard_views: Dict[str, List[Tuple[object, List[str]]]] = {}
+        self.lock = threading.Lock()
+
+    def add(self, command, keyword: str, languages: Iterable[str] = ()) -> Set[str]:
+        """Index one keyword of a command. Returns words that are new to the index."""
+        new_words = set()
+        with self.lock:
+            self.order.setdefault(command, len(self.order))
+            self._tag(command, keyword, languages)
+            owners = self.owners.setdefault(keyword, [])
+            if command in owners:
+                return new_words
+            owners.append(command)
+            if keyword not in self.cleaned:
+                self.cleaned[keyword] = FuzzyMatcher._clean_string(keyword)
+            for word in keyword.split():
+                count = self.word_counts.get(word, 0)
+                if count == 0:
+                    new_words.add(word)
+                self.word_counts[word] = count + 1
+        return new_words
+
+    def remove(self, command, keyword: str, languages: Iterable[str] = ()) -> Set[str]:
+        """Drop one keyword of a command. Returns words no keyword uses any more."""
+        gone_words = set()
+        with self.lock:
+            self._untag(command, keyword, languages)
+            owners = self.owners.get(keyword)
+            if not owners or command not in owners:
+                return gone_words
+            owners.remove(command)
+            if not owners:
+                del self.owners[keyword]
+                self.cleaned.pop(keyword, None)
+            for word in keyword.split():
+                count = self.word_counts.get(word, 0) - 1
+                if count <= 0:
+                    self.word_counts.pop(word, None)
+                    gone_words.add(word)
+                else:
+                    self.word_counts[word] = count
+        return gone_words
+
+    def update(self, command, old_keywords: Iterable[str], new_keywords: Iterable[str],
+               old_languages: Optional[Dict[str, List[str]]] = None,
+               new_languages: Optional[Dict[str, List[str]]] = None) -> Tuple[Set[str], Set[str]]:
+        """
+        Apply a keyword diff for one command. The language maps give each
+        keyword's language codes (keyword -> codes; missing means untagged).
+        Returns (added words, removed words).
+        """
+        old, new = set(old_keywords), set(new_keywords)
+        old_languages, new_languages = old_languages or {}, new_languages or {}
+        added_words, removed_words = set(), set()
+        for keyword in old - new:
+            removed_words |= self.remove(command, keyword, old_languages.get(keyword, ()))
+        for keyword in new - old:
+            added_words |= self.add(command, keyword, new_languages.get(keyword, ()))
+        for keyword in old & new:
+            before, after = old_languages.get(keyword, ()), new_languages.get(keyword, ())
+            if set(before) != set(after):
+                with self.lock:
+                    self._untag(command, keyword, before)
+                    self._tag(command, keyword, after)
+        # A word can be dropped by one keyword and reintroduced by another
+        return added_words - removed_words, removed_words - added_words
+
+    def _tag(self, command, keyword: str, languages: Iterable[str]):
+        """Add a keyword to its language shards (caller holds the lock)"""
+        for language in languages or (None,):
+            owners = self.shards.setdefault(language, {}).setdefault(keyword, [])
+            if command not in owners:
+                owners.append(command)
+        self._shard_views = {}
+
+    def _untag(self, command, keyword: str, languages: Iterable[str]):
+        """Remove a keyword from its language shards (caller holds the lock)"""
+        for language in languages or (None,):
+            shard = self.shards.get(language, {})
+            owners = shard.get(keyword)
+            if owners and command in owners:
+                owners.remove(command)
+                if not owners:
+                    del shard[keyword]
+        self._shard_views = {}
+
+    def languages(self) -> List[str]:
+        """Language codes that have tagged keywords"""
+        return [language for language, shard in self.shards.items() if language and shard]
+
+    def shard(self, language: str) -> Optional[List[Tuple[object, List[str]]]]:
+        """
+        (command, keywords) candidates for one language plus untagged keywords,
+        in registration order. None if no keyword is tagged with the language.
+        """
+        view = self._shard_views.get(language)
+        if view is not None:
+            return view
+        with self.lock:
+            if not self.shards.get(language):
+                return None
+            by_command: Dict[object, List[str]] = {}
+            for shard_language in (language, None):
+                for keyword, owners in self.shards.get(shard_language, {}).items():
+                    for command in owners:
+                        by_command.setdefault(command, []).append(keyword)
+            view = sorted(by_command.items(), key=lambda item: self.order[item[0]])
+            self._shard_views[language] = view
+        return view
+
+    def words(self) -> Dict[str, int]:
+        """Every word used by some keyword (dict for O(1) membership)"""
+        return self.word_counts
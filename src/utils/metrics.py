@@ -0,0 +1,261 @@
+import bisect
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+class LatencyHistogram:
+    """
+    HDR-style latency histogram.
+
+    Values (in seconds) are stored in log-linear buckets: each power of two is
+    split into SUB_BUCKETS linear buckets, which keeps the relative error
+    below 1/SUB_BUCKETS at any magnitude while using a fixed, small amount of
+    memory. Recording is O(1).
+    """
+
+    SUB_BUCKETS = 32
+    MIN_VALUE = 1e-6  # 1 microsecond resolution
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.lock = threading.Lock()
+
+    def _bucket(self, value: float) -> int:
+        units = max(value / self.MIN_VALUE, 1.0)
+        exponent = int(math.log2(units))
+        sub = int((units / (1 << exponent) - 1.0) * self.SUB_BUCKETS)
+        return exponent * self.SUB_BUCKETS + min(sub, self.SUB_BUCKETS - 1)
+
+    def _bucket_upper(self, bucket: int) -> float:
+        exponent, sub = divmod(bucket, self.SUB_BUCKETS)
+        return (1 << exponent) * (1.0 + (sub + 1) / self.SUB_BUCKETS) * self.MIN_VALUE
+
+    def record(self, value: float):
+        """Record one observation in seconds"""
+        bucket = self._bucket(value)
+        with self.lock:
+            self.counts[bucket] = self.counts.get(bucket, 0) + 1
+            self.count += 1
+            self.total += value
+            if value > self.max:
+                self.max = value
+
+    def percentile(self, percent: float) -> float:
+        """Approximate value at the given percentile (0-100), in seconds"""
+        with self.lock:
+            if self.count == 0:
+                return 0.0
+            target = max(1, math.ceil(self.count * percent / 100.0))
+            seen = 0
+            for bucket in sorted(self.counts):
+                seen += self.counts[bucket]
+                if seen >= target:
+                    return min(self._bucket_upper(bucket), self.max)
+            return self.max
+
+    def cumulative(self, bounds: List[float]) -> List[int]:
+        """Counts of observations <= each bound, for Prometheus buckets"""
+        with self.lock:
+            items = sorted(self.counts.items())
+        result = []
+        for bound in bounds:
+            result.append(sum(count for bucket, count in items if self._bucket_upper(bucket) <= bound))
+        return result
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+class ValueHistogram:
+    """Histogram with fixed bucket bounds, for values that can be negative (e.g. SNR in dB)"""
+
+    def __init__(self, bounds: List[float]):
+        self.bounds = bounds
+        # counts[i]: values <= bounds[i] and above the previous bound; the last slot is +Inf
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, value: float):
+        index = bisect.bisect_left(self.bounds, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += value
+
+    def cumulative(self) -> List[int]:
+        """Counts of observations <= each bound, for Prometheus buckets"""
+        with self.lock:
+            counts = list(self.counts)
+        result, seen = [], 0
+        for count in counts[:-1]:
+            seen += count
+            result.append(seen)
+        return result
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+class MetricsRegistry:
+    """Per-stage and per-command latency histograms, SNR histograms and counters with Prometheus text export"""
+
+    STAGES = ["record", "transcribe", "activation", "exact_dispatch", "fuzzy_match",
+              "suggestion", "execute", "speak", "barge_in"]
+    # Prometheus bucket bounds in seconds
+    EXPORT_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                      0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+    # Bucket bounds in dB for the recording SNR per match outcome
+    SNR_BUCKETS = [-10.0, -5.0, 0.0, 5.0, 10.0, 15.0, 20.0, 25.0, 30.0, 40.0]
+
+    def __init__(self, prefix: str = "furina"):
+        self.prefix = prefix
+        # (stage, command) -> histogram; command is "" for stage-wide totals
+        self.histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        # Monotonic event counts, e.g. dropped audio frames
+        self.counters: Dict[str, float] = {}
+        # Match outcome ("matched", "failed") -> SNR of the recordings, in dB
+        self.snr: Dict[str, ValueHistogram] = {}
+        self.lock = threading.Lock()
+        self._server = None
+
+    def histogram(self, stage: str, command: str = "") -> LatencyHistogram:
+        key = (stage, command)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(key, LatencyHistogram())
+        return histogram
+
+    def observe(self, stage: str, seconds: float, command: Optional[str] = None):
+        """Record a latency for a stage, and for the command if given"""
+        self.histogram(stage).record(seconds)
+        if command:
+            self.histogram(stage, command).record(seconds)
+
+    def increment(self, name: str, value: float = 1):
+        """Add to a counter, exported as <prefix>_<name>_total"""
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def counter(self, name: str) -> float:
+        return self.counters.get(name, 0)
+
+    def observe_snr(self, outcome: str, snr_db: float):
+        """Record the SNR of a recording under its match outcome"""
+        histogram = self.snr.get(outcome)
+        if histogram is None:
+            with self.lock:
+                histogram = self.snr.setdefault(outcome, ValueHistogram(self.SNR_BUCKETS))
+        histogram.record(snr_db)
+
+    def snr_histogram(self, outcome: str) -> Optional[ValueHistogram]:
+        return self.snr.get(outcome)
+
+    @contextmanager
+    def time(self, stage: str, command: Optional[str] = None):
+        """Context manager that records how long the block took"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, command)
+
+    def summary(self, command: str = "") -> Dict[str, Dict[str, float]]:
+        """p50/p95/p99 (seconds) and count per stage"""
+        result = {}
+        for (stage, cmd), histogram in sorted(self.histograms.items()):
+            if cmd != command or histogram.count == 0:
+                continue
+            result[stage] = {
+                "count": histogram.count,
+                "p50": histogram.percentile(50),
+                "p95": histogram.percentile(95),
+                "p99": histogram.percentile(99),
+            }
+        return result
+
+    def commands(self) -> List[str]:
+        return sorted({cmd for _, cmd in self.histograms if cmd})
+
+    def export_prometheus(self) -> str:
+        """Render all histograms in the Prometheus text exposition format"""
+        name = f"{self.prefix}_stage_latency_seconds"
+        lines = [
+            f"# HELP {name} Latency of each voice pipeline stage.",
+            f"# TYPE {name} histogram",
+        ]
+        for (stage, command), histogram in sorted(self.histograms.items()):
+            labels = f'stage="{stage}"'
+            if command:
+                labels += f',command="{command}"'
+            counts = histogram.cumulative(self.EXPORT_BUCKETS)
+            for bound, count in zip(self.EXPORT_BUCKETS, counts):
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.total:.6f}")
+            lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+        if self.snr:
+            snr_name = f"{self.prefix}_utterance_snr_db"
+            lines.append(f"# HELP {snr_name} Signal-to-noise ratio of recordings by match outcome.")
+            lines.append(f"# TYPE {snr_name} histogram")
+            for outcome, histogram in sorted(self.snr.items()):
+                labels = f'outcome="{outcome}"'
+                for bound, count in zip(histogram.bounds, histogram.cumulative()):
+                    lines.append(f'{snr_name}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'{snr_name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f"{snr_name}_sum{{{labels}}} {histogram.total:.3f}")
+                lines.append(f"{snr_name}_count{{{labels}}} {histogram.count}")
+        for counter, value in sorted(self.counters.items()):
+            counter_name = f"{self.prefix}_{counter}_total"
+            lines.append(f"# TYPE {counter_name} counter")
+            lines.append(f"{counter_name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def write_file(self, path: str):
+        """Write the Prometheus export to a file (e.g. for node_exporter's textfile collector)"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.export_prometheus())
+        os.replace(tmp_path, path)
+
+    def start_http_server(self, port: int = 9464, host: str = "127.0.0.1"):
+        """Serve /metrics on a local HTTP endpoint from a daemon thread"""
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.export_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        thread.start()
+        return self._server
+
+    def stop_http_server(self):
+        if self._server:
+            self._server.shutdown()
+            self._server = None
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+            self.counters = {}
+            self.snr = {}
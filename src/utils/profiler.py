@@ -0,0 +1,185 @@
+import cProfile
+import os
+import signal
+import threading
+import tracemalloc
+from datetime import datetime
+from typing import List, Optional
+
+class Profiler:
+    """
+    On-demand cProfile + tracemalloc profiling of selected methods.
+
+    Watched methods are only wrapped while profiling is enabled: the wrapper is
+    set as an instance attribute on enable() and removed on disable(), so there
+    is no overhead at all while it is off.
+    """
+
+    def __init__(self, output_dir: str = "profiles", trace_frames: int = 10):
+        self.output_dir = output_dir
+        self.trace_frames = trace_frames
+        self.enabled = False
+        self.targets = []  # (obj, method_name, label)
+        self._patched = []  # (obj, method_name, had_instance_attr, previous)
+        self._profile = None
+        # cProfile can only be active once at a time, so one thread profiles at a time
+        self._busy = threading.Lock()
+        self._local = threading.local()
+        # Guards _profile, _active and _pending; reentrant because the signal handler can run mid-call
+        self._lock = threading.RLock()
+        # Profiled calls in progress on any thread
+        self._active = 0
+        # Disabled profile still in use by a running call, dumped when the call returns
+        self._pending = None
+        self._started_tracemalloc = False
+        self.last_dump: List[str] = []
+
+    def watch(self, obj, method_name: str, label: Optional[str] = None):
+        """Register a method to profile, e.g. watch(processor, 'process_text')"""
+        self.targets.append((obj, method_name, label or f"{obj.__class__.__name__}.{method_name}"))
+        if self.enabled:
+            self._patch(obj, method_name)
+
+    def enable(self) -> bool:
+        """Start profiling. Returns False if it was already running."""
+        if self.enabled:
+            return False
+        with self._lock:
+            pending = None
+            if self._pending is not None and not self._active:
+                pending, self._pending = self._pending, None
+            self._profile = cProfile.Profile()
+        if pending is not None:
+            # Flush the previous session first so it can't be confused with this one
+            self._finish(pending)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.trace_frames)
+            self._started_tracemalloc = True
+        for obj, method_name, _ in self.targets:
+            self._patch(obj, method_name)
+        self.enabled = True
+        return True
+
+    def disable(self) -> List[str]:
+        """Stop profiling and dump results. Returns the written file paths."""
+        if not self.enabled:
+            return []
+        self.enabled = False
+        self._unpatch_all()
+
+        with self._lock:
+            profile, self._profile = self._profile, None
+            if self._active:
+                # A profiled call is running (maybe the voice command calling us); dump when it returns
+                self._pending = profile
+                return []
+        return self._finish(profile)
+
+    def toggle(self) -> bool:
+        """Toggle profiling. Returns the new state."""
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable()
+        return self.enabled
+
+    def install_signal_handler(self, signum: Optional[int] = None) -> bool:
+        """Toggle profiling on a POSIX signal (SIGUSR1 by default)"""
+        if signum is None:
+            signum = getattr(signal, "SIGUSR1", None)
+        if signum is None:
+            return False
+        try:
+            signal.signal(signum, lambda *_: self.toggle())
+            return True
+        except ValueError:  # Not in the main thread
+            return False
+
+    def status(self) -> str:
+        if self.enabled:
+            labels = ", ".join(label for _, _, label in self.targets)
+            return f"Profiling enabled ({labels})"
+        return "Profiling disabled"
+
+    def _patch(self, obj, method_name: str):
+        had_instance_attr = method_name in vars(obj)
+        previous = vars(obj).get(method_name)
+        original = getattr(obj, method_name)
+        setattr(obj, method_name, self._wrap(original))
+        self._patched.append((obj, method_name, had_instance_attr, previous))
+
+    def _unpatch_all(self):
+        for obj, method_name, had_instance_attr, previous in reversed(self._patched):
+            if had_instance_attr:
+                setattr(obj, method_name, previous)
+            else:
+                delattr(obj, method_name)
+        self._patched = []
+
+    def _wrap(self, original):
+        profiler = self
+
+        def profiled(*args, **kwargs):
+            local = profiler._local
+            # Nested watched calls are already covered by the outer one
+            if getattr(local, "depth", 0) or not profiler._busy.acquire(blocking=False):
+                return original(*args, **kwargs)
+            with profiler._lock:
+                # disable() may have finished on another thread since this wrapper was looked up
+                profile = profiler._profile
+                if profile is not None:
+                    profiler._active += 1
+            if profile is None:
+                profiler._busy.release()
+                return original(*args, **kwargs)
+            local.depth = 1
+            try:
+                return profile.runcall(original, *args, **kwargs)
+            finally:
+                local.depth = 0
+                with profiler._lock:
+                    profiler._active -= 1
+                    pending = None
+                    if profiler._pending is not None and not profiler._active:
+                        pending, profiler._pending = profiler._pending, None
+                profiler._busy.release()
+                if pending is not None:
+                    profiler._finish(pending)
+
+        profiled.__wrapped__ = original
+        return profiled
+
+    def _finish(self, profile) -> List[str]:
+        """Write the given profile's pstats and an allocation snapshot, then release tracemalloc unless re-enabled"""
+        paths = []
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+
+            if profile is not None:
+                path = os.path.join(self.output_dir, f"profile-{stamp}.pstats")
+                profile.dump_stats(path)
+                paths.append(path)
+
+            if tracemalloc.is_tracing():
+                snapshot = tracemalloc.take_snapshot()
+                path = os.path.join(self.output_dir, f"alloc-{stamp}.tracemalloc")
+                snapshot.dump(path)
+                paths.append(path)
+
+                summary_path = os.path.join(self.output_dir, f"alloc-{stamp}.txt")
+                with open(summary_path, "w", encoding="utf-8") as f:
+                    for stat in snapshot.statistics("lineno")[:25]:
+                        f.write(f"{stat}\n")
+                paths.append(summary_path)
+        except OSError as e:
+            print(f"Error writing profile: {e}")
+        finally:
+            if self._started_tracemalloc and not self.enabled:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+
+        self.last_dump = paths
+        if paths:
+            print(f"Profile written: {', '.join(paths)}")
+        return paths
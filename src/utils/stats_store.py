@@ -0,0 +1,226 @@
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+class StatsStore:
+    """
+    Durable, append-only log of processed utterances.
+
+    record() only puts the event on a bounded queue, so it never blocks the
+    voice loop; a background thread writes events to SQLite (WAL mode) in
+    batches. Each batch also updates a per-day rollup table, and raw events
+    older than retention_days are rotated out, so aggregate queries over
+    months of history only touch the small rollup table.
+    """
+
+    SCHEMA = [
+        """CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY,
+            ts REAL NOT NULL,
+            text TEXT,
+            command TEXT,
+            match_type TEXT NOT NULL,
+            keyword TEXT,
+            confidence REAL,
+            latency_ms REAL,
+            snr_db REAL
+        )""",
+        "CREATE INDEX IF NOT EXISTS events_ts ON events(ts)",
+        """CREATE TABLE IF NOT EXISTS daily (
+            day TEXT NOT NULL,
+            command TEXT NOT NULL,
+            match_type TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            latency_ms_sum REAL NOT NULL,
+            PRIMARY KEY (day, command, match_type)
+        )""",
+    ]
+
+    def __init__(self, path: str = "assistant_stats.db", batch_size: int = 200,
+                 flush_interval: float = 1.0, retention_days: int = 30, max_queue: int = 10000):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retention_days = retention_days
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self._closed = False
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+            # Databases created before SNR was recorded
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(events)")]
+            if "snr_db" not in columns:
+                conn.execute("ALTER TABLE events ADD COLUMN snr_db REAL")
+
+        self._writer = threading.Thread(target=self._write_loop, name="stats-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5.0)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def record(self, text: str, command: Optional[str], match_type: str, keyword: Optional[str] = None,
+               confidence: Optional[float] = None, latency_ms: Optional[float] = None, ts: Optional[float] = None,
+               snr_db: Optional[float] = None):
+        """Queue one utterance event. Never blocks; events are dropped if the writer falls behind."""
+        if self._closed:
+            return
+        event = (ts or time.time(), text, command, match_type, keyword, confidence, latency_ms, snr_db)
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout: float = 5.0):
+        """Wait until queued events have been written"""
+        deadline = time.time() + timeout
+        while self.queue.unfinished_tasks and time.time() < deadline:
+            time.sleep(0.01)
+
+    def close(self):
+        """Write remaining events and stop the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self.queue.put(None)
+        self._writer.join(timeout=5.0)
+
+    def _write_loop(self):
+        conn = self._connect()
+        last_rotation = 0.0
+        running = True
+
+        while running:
+            batch = []
+            try:
+                item = self.queue.get(timeout=self.flush_interval)
+                if item is None:
+                    running = False
+                else:
+                    batch.append(item)
+                # Drain whatever else is already waiting, up to one batch
+                while running and len(batch) < self.batch_size:
+                    item = self.queue.get_nowait()
+                    if item is None:
+                        running = False
+                    else:
+                        batch.append(item)
+            except queue.Empty:
+                pass
+
+            if batch:
+                try:
+                    self._write_batch(conn, batch)
+                except sqlite3.Error as e:
+                    print(f"Error writing stats: {e}")
+
+            for _ in range(len(batch) + (0 if running else 1)):
+                self.queue.task_done()
+
+            if time.time() - last_rotation > 3600:
+                self._rotate(conn)
+                last_rotation = time.time()
+
+        conn.close()
+
+    def _write_batch(self, conn: sqlite3.Connection, batch: List[Tuple]):
+        rollup: Dict[Tuple[str, str, str], List[float]] = {}
+        for ts, _, command, match_type, _, _, latency_ms, _ in batch:
+            day = datetime.fromtimestamp(ts).strftime("%Y-%m-%d")
+            key = (day, command or "", match_type)
+            entry = rollup.setdefault(key, [0, 0.0])
+            entry[0] += 1
+            entry[1] += latency_ms or 0.0
+
+        with conn:
+            conn.executemany(
+                "INSERT INTO events (ts, text, command, match_type, keyword, confidence, latency_ms, snr_db) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                batch
+            )
+            conn.executemany(
+                "INSERT INTO daily (day, command, match_type, count, latency_ms_sum) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(day, command, match_type) DO UPDATE SET "
+                "count = count + excluded.count, latency_ms_sum = latency_ms_sum + excluded.latency_ms_sum",
+                [(day, command, match_type, count, latency) for (day, command, match_type), (count, latency) in rollup.items()]
+            )
+
+    def _rotate(self, conn: sqlite3.Connection):
+        """Drop raw events past the retention window; daily rollups are kept"""
+        if not self.retention_days:
+            return
+        cutoff = time.time() - self.retention_days * 86400
+        try:
+            with conn:
+                conn.execute("DELETE FROM events WHERE ts < ?", (cutoff,))
+        except sqlite3.Error as e:
+            print(f"Error rotating stats: {e}")
+
+    # Query helpers (run on the caller's thread with their own connection)
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        conn = self._connect()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _since_day(days: Optional[int]) -> str:
+        if not days:
+            return ""
+        return (datetime.now() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+
+    def totals(self, days: Optional[int] = None) -> Dict[str, int]:
+        """Event counts per match type, over all time or the last N days"""
+        rows = self._query(
+            "SELECT match_type, SUM(count) FROM daily WHERE day >= ? GROUP BY match_type",
+            (self._since_day(days),)
+        )
+        return {match_type: count for match_type, count in rows}
+
+    def top_commands(self, limit: int = 5, days: Optional[int] = None) -> List[Tuple[str, int, float]]:
+        """Most used commands: (command, count, average latency in ms)"""
+        return self._query(
+            "SELECT command, SUM(count) AS n, SUM(latency_ms_sum) / SUM(count) FROM daily "
+            "WHERE day >= ? AND command != '' GROUP BY command ORDER BY n DESC LIMIT ?",
+            (self._since_day(days), limit)
+        )
+
+    def daily_counts(self, days: int = 7) -> List[Tuple[str, int, int]]:
+        """Per-day (day, total, failed) for the last N days"""
+        return self._query(
+            "SELECT day, SUM(count), SUM(CASE WHEN match_type = 'failed' THEN count ELSE 0 END) "
+            "FROM daily WHERE day >= ? GROUP BY day ORDER BY day",
+            (self._since_day(days),)
+        )
+
+    def failures_by_snr(self, days: Optional[int] = None) -> List[Tuple[str, int, int]]:
+        """(SNR band, utterances, failed) over raw events that have an SNR, noisiest band first"""
+        since = time.time() - days * 86400 if days else 0
+        return self._query(
+            "SELECT CASE WHEN snr_db < 10 THEN '< 10 dB' WHEN snr_db < 20 THEN '10-20 dB' ELSE '>= 20 dB' END AS band, "
+            "COUNT(*), SUM(CASE WHEN match_type = 'failed' THEN 1 ELSE 0 END) FROM events "
+            "WHERE snr_db IS NOT NULL AND match_type != 'ignored' AND ts >= ? "
+            "GROUP BY band ORDER BY MIN(snr_db)",
+            (since,)
+        )
+
+    def recent(self, limit: int = 20, match_type: Optional[str] = None) -> List[Tuple]:
+        """Latest raw events: (ts, text, command, match_type, keyword, confidence, latency_ms)"""
+        if match_type:
+            return self._query(
+                "SELECT ts, text, command, match_type, keyword, confidence, latency_ms FROM events "
+                "WHERE match_type = ? ORDER BY ts DESC LIMIT ?", (match_type, limit)
+            )
+        return self._query(
+            "SELECT ts, text, command, match_type, keyword, confidence, latency_ms FROM events "
+            "ORDER BY ts DESC LIMIT ?", (limit,)
+        )